@@ -3,12 +3,22 @@ import pandas as pd
 from datetime import datetime, timedelta
 import streamlit as st
 import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import Future
 import gspread
 import holidays
 import pytz
 import numpy as np 
 from oauth2client.service_account import ServiceAccountCredentials
 
+from indicators import IndicatorFrame
+from signal_store import HEADER_STRATEGY, SignalStore, bar_window_hash, make_record, signal_records
+from strategy_rules import KOSDAQ_POSITION_RULES, LEVERAGE_SIGNAL_RULES
+
 # ==============================================================================
 # Google Sheets 연동 관련 함수
 # 향후 Google Sheets에서 데이터를 읽어오기 위한 클라이언트 설정
@@ -85,7 +95,32 @@ def next_business_day(date):
 # ==============================================================================
 # 전략 리스트 HTML 생성 함수
 # ==============================================================================
-def create_strategy_list_html(recent_df, prev_day_df, prev2_day_df):
+def build_strategy_rows(recent_df):
+    """
+    전략리스트에 표시할 최근 거래일의 판단을 스냅샷에 저장 가능한 dict 리스트로 변환합니다.
+    최신 날짜가 먼저 오며, date는 전략이 적용되는 다음 영업일(YYYY-MM-DD)입니다.
+    """
+    strategy_rows = []
+
+    # 🎯 수정: 실제 거래일 기준 최근 6일 고정 표시
+    # recent_df에서 마지막 6개 행 추출 (이미 거래일만 포함됨)
+    display_days = min(6, len(recent_df) - 1)  # 최대 6일, prev_row 참조 위해 -1
+    start_idx = len(recent_df) - display_days
+
+    for i in reversed(range(start_idx, len(recent_df))):
+        row = recent_df.iloc[i]
+
+        # 다음 영업일 계산
+        strategy_date = next_business_day(row.name)
+
+        strategy_rows.append({
+            "date": strategy_date.isoformat(),
+            "판단": row["판단"],
+            "is_latest": i == len(recent_df) - 1,  # 가장 최근 데이터에만 강조 표시
+        })
+    return strategy_rows
+
+def create_strategy_list_html(strategy_rows):
     
     list_header_html = f'''
     <div style="display:flex; justify-content:space-between; align-items:center; margin-bottom:12px; padding: 0 8px;">
@@ -95,28 +130,14 @@ def create_strategy_list_html(recent_df, prev_day_df, prev2_day_df):
 
     rows_html = ""
 
-    # 🎯 수정: 실제 거래일 기준 최근 6일 고정 표시
-    # recent_df에서 마지막 6개 행 추출 (이미 거래일만 포함됨)
-    display_days = min(6, len(recent_df) - 1)  # 최대 6일, prev_row 참조 위해 -1
-    start_idx = len(recent_df) - display_days
-    
-    for i in reversed(range(start_idx, len(recent_df))):
-        row = recent_df.iloc[i]
-        
-        # prev_row 안전하게 참조
-        if i > 0:
-            prev_row = recent_df.iloc[i-1]
-        else:
-            prev_row = row  # 첫 행인 경우 자기 자신 참조 (안전장치)
-        
+    for row in strategy_rows:
         card_style = "padding:14px 16px; background:#fff; border-radius:12px; margin-bottom:12px; box-shadow:0 1px 3px rgba(0,0,0,0.06);"
         
         # 가장 최근 데이터에만 강조 표시
-        if i == len(recent_df) - 1: 
+        if row["is_latest"]: 
             card_style += f" border-left:4px solid {get_color(row['판단'])};"
 
-        # 다음 영업일 계산
-        strategy_date = next_business_day(row.name)
+        strategy_date = datetime.strptime(row["date"], "%Y-%m-%d").date()
 
         rows_html += f"""\
         <div style="{card_style}">\
@@ -140,379 +161,100 @@ def create_strategy_list_html(recent_df, prev_day_df, prev2_day_df):
 # ==============================================================================
 # 코스닥150 레버리지 전략 계산 함수
 # ==============================================================================
-def calculate_kosdaq_strategy(df_kosdaq, df_leverage):
+def calculate_kosdaq_strategy(kosdaq_frame, df_leverage, frames=None):
 
-    # 20일 이동평균 및 이격도 계산
-    df_kosdaq["Close_MA20"] = df_kosdaq["Close"].rolling(20).mean().fillna(method='ffill')
-    df_kosdaq["Disparity"] = (df_kosdaq["Close"] / df_kosdaq["Close_MA20"]) * 100
-    df_kosdaq.dropna(inplace=True)
-    
-    # 포지션 컬럼 초기화
-    df_kosdaq["포지션"] = "현금"
-    
-    # 순차적으로 포지션 계산 (초기값: 현금)
-    for i in range(1, len(df_kosdaq)):
-        prev_position = df_kosdaq.iloc[i-1]["포지션"]
-        
-        # 직전 10개 영업일의 max(close - open) 계산 (하락일은 0 처리)
-        close_open_diffs = []
-        for j in range(max(0, i-10), i):
-            close_val = float(df_kosdaq.iloc[j]["Close"])
-            open_val = float(df_kosdaq.iloc[j]["Open"])
-            diff = max(0, close_val - open_val)  # 하락일은 0
-            close_open_diffs.append(diff)
-        
-        max_close_open_10 = max(close_open_diffs) if close_open_diffs else 0
-
-        # K(B), K(S) 계산
-        prev_high = float(df_kosdaq.iloc[i-1]["High"])
-        prev_low = float(df_kosdaq.iloc[i-1]["Low"])
-        today_open = float(df_kosdaq.iloc[i]["Open"])
-        today_high = float(df_kosdaq.iloc[i]["High"])
-        today_low = float(df_kosdaq.iloc[i]["Low"])
-        
-        K_B = np.ceil(today_open + min((prev_high - prev_low) * 0.4, max_close_open_10))
-        K_S = np.floor(today_open - (prev_high - prev_low) * 0.3)
-        
-        # 전일 이격도 가져오기 (매도 조건에 필요)
-        # 날짜 매칭으로 전일 이격도 찾기
-        current_date = df_kosdaq.index[i]
-        prev_date = df_kosdaq.index[i-1]
-        
-        # 전일 이격도 (코스닥150 & 레버리지)
-        try:
-            prev_kosdaq_disparity = float(df_kosdaq.iloc[i-1]["Disparity"])
-        except:
-            prev_kosdaq_disparity = 999  # 이격도 없으면 매도 불가
-            
-        try:
-            # 레버리지 데이터에서 같은 날짜의 전일 이격도 찾기
-            if prev_date in df_leverage.index:
-                prev_leverage_disparity = float(df_leverage.loc[prev_date, "Disparity"])
-            else:
-                prev_leverage_disparity = 999
-        except:
-            prev_leverage_disparity = 999
-        
-        # 매수 조건: 전일 현금 & K(S)가 당일 고가~저가 범위 내
-        can_buy = (today_low <= K_B <= today_high)
-        
-        # 매도 조건: 전일 보유 & K(B)가 당일 고가~저가 범위 내 & 양쪽 전일 이격도 106 이하
-        can_sell = (
-            (today_low <= K_S <= today_high) and
-            (prev_kosdaq_disparity <= 106) and
-            (prev_leverage_disparity <= 106)
-        )
-        
-        if prev_position == "현금" and can_buy:
-            df_kosdaq.at[df_kosdaq.index[i], "포지션"] = "보유"
-        elif prev_position == "보유" and can_sell:
-            df_kosdaq.at[df_kosdaq.index[i], "포지션"] = "현금"
-        else:
-            df_kosdaq.at[df_kosdaq.index[i], "포지션"] = prev_position
-    
-    return df_kosdaq
+    # 20일 이동평균 및 이격도 (indicators 레지스트리에서 계산)
+    df_kosdaq = kosdaq_frame.columns("Close_MA20", "Disparity").dropna()
 
-# ==============================================================================
-# 메인 애플리케이션 로직 시작
-# ==============================================================================
+    # K(B), K(S)는 이동평균이 유효한 구간 안에서 계산 (직전 10일 max(close - open)도 이 구간 기준)
+    df_kosdaq = get_indicator_frame(frames, "kosdaq_thresholds", df_kosdaq).columns("K_B", "K_S")
 
-# 4-1. 전역 폰트 설정을 위한 CSS 주입
-st.markdown("""
-<style>
-    html, body, [class*="st-"] {
-        font-family: 'Noto Sans KR', sans-serif !important;
-    }
-</style>
-""", unsafe_allow_html=True)
+    # 레버리지 데이터에서 같은 날짜의 이격도 찾기 (없으면 999 = 매도 불가)
+    if "Disparity" in df_leverage.columns:
+        df_kosdaq["Leverage_Disparity"] = df_leverage["Disparity"].reindex(df_kosdaq.index).fillna(999)
+    else:
+        df_kosdaq["Leverage_Disparity"] = 999
 
-    
-# === 1. 설정값 정의 ===
-LEVERAGE_TICKER = "122630"  # KODEX 레버리지
-INVERSE_TICKER = "252670"   # KODEX 인버스
-KOSDAQ_LEVERAGE_TICKER = "233740"  # KODEX 코스닥150 레버리지
+    # 포지션 계산 (초기값: 현금) - 규칙은 strategy_rules.kosdaq_position_rules 참고
+    return KOSDAQ_POSITION_RULES.apply(df_kosdaq)
 
-# 데이터 조회 기간 설정 (오늘 기준 과거 40일 ~ 미래 1일)
-today = datetime.now()
-start_date = today - timedelta(days=60)
-end_date = today + timedelta(days=1)
-
-# === 2. 데이터 로드 및 전처리 ===
-df_leverage = fdr.DataReader(LEVERAGE_TICKER, start_date, end_date)
-df_inverse = fdr.DataReader(INVERSE_TICKER, start_date, end_date)
-df_kosdaq = fdr.DataReader(KOSDAQ_LEVERAGE_TICKER, start_date, end_date)
-
-
-# 레버리지 데이터를 메인으로 사용 (기존 로직 유지)
-df = df_leverage.copy()
-
-# 다운로드된 데이터프레임의 컬럼이 MultiIndex일 경우 단일 레벨로 평탄화
-if isinstance(df.columns, pd.MultiIndex):
-    df.columns = df.columns.get_level_values(0)
-if isinstance(df_inverse.columns, pd.MultiIndex):
-    df_inverse.columns = df_inverse.columns.get_level_values(0)
-if isinstance(df_kosdaq.columns, pd.MultiIndex):
-    df_kosdaq.columns = df_kosdaq.columns.get_level_values(0)
-
-# 데이터 유효성 검사: 데이터가 없거나 전략 계산에 필요한 최소 일수 미만일 경우 오류 메시지 출력
-if df.empty or len(df) < 22: # 최소 20일 이동평균 + 추가 데이터 필요
-    st.error("❌ 데이터가 부족하거나 불러오지 못했습니다. 날짜 범위를 확인해 주세요.")
-else: # 데이터가 충분히 있을 경우에만 실행
-    # 3일 이동평균 거래량 계산 
-    df["Volume_MA3"] = df["Volume"].rolling(3).mean().fillna(method='ffill')
-    # 20일 이동평균 종가 계산 
-    df["Close_MA20"] = df["Close"].rolling(20).mean().fillna(method='ffill')
-    # 이격도 계산: (현재 종가 / 20일 이동평균 종가) * 100
-    df["Disparity"] = (df["Close"] / df["Close_MA20"]) * 100
-    df.dropna(inplace=True) # 모든 계산 후 발생할 수 있는 추가적인 NaN 값 포함 행 제거
+# ==============================================================================
+# 레버리지 전략 계산 함수
+# ==============================================================================
+def get_indicator_frame(frames, key, bars):
+    """
+    frames(dict)에 key로 보관된 IndicatorFrame을 새 봉으로 갱신해 반환합니다.
+    이전 계산 결과가 있으면 바뀐 뒤쪽 구간만 다시 계산합니다. frames가 None이면 새로 만듭니다.
+    """
+    if frames is None:
+        return IndicatorFrame(bars)
+    frame = frames.get(key)
+    if frame is None:
+        frame = frames[key] = IndicatorFrame(bars)
+    else:
+        frame.update(bars)
+    return frame
 
-    # 코스닥150 레버리지 전략 계산
-    df_kosdaq = calculate_kosdaq_strategy(df_kosdaq, df_leverage)
+def prepare_leverage_indicators(leverage_frame):
+    # 3일 이동평균 거래량, 20일 이동평균 종가, 이격도 (indicators 레지스트리에서 계산)
+    df = leverage_frame.columns("Volume_MA3", "Close_MA20", "Disparity")
+    df.dropna(inplace=True) # 모든 계산 후 발생할 수 있는 추가적인 NaN 값 포함 행 제거
+    # 기본 전략 판단 (레버리지, 인버스, 현금보유)
+    df["판단"] = leverage_frame["판단"]
+    return df
 
-    # === 3. 핵심 전략 로직 (전략 판단 및 액션 결정) ===
+def calculate_leverage_strategy(df):
     # 최근 14일치 데이터를 복사하여 전략 판단에 사용 (충분한 과거 데이터 확보)
     recent = df.tail(20).copy()
-    
-    # 3-1. 기본 전략 판단 (레버리지, 인버스, 현금보유)
-    for i in range(1, len(recent)):
-        row = recent.iloc[i] # 현재 일자의 데이터
-        prev_row = recent.iloc[i - 1] # 이전 일자의 데이터
-        disparity_r = float(row["Disparity"])
-        prev_disparity = float(prev_row["Disparity"])
-        d = "현금보유" # 기본 판단값
-        
-        # 조건1 (거래량 감소) 또는 조건2 (저가 상승) 충족 시
-        if float(row["Volume"]) < float(row["Volume_MA3"]) or float(row["Low"]) > float(prev_row["Low"]):
-            if disparity_r < 98 or disparity_r > 106: # 이격도 기준에 따라 '레버리지'
-                d = "레버리지"
-            else: # 이외는 '현금보유'
-                d = "현금보유"
-        elif disparity_r < 101: # 조건1,2 미충족 시 이격도 기준 및 추가 인버스 진입 조건 확인
-            # 인버스 진입 조건: ABS(당일 이격도 - 전날 이격도) < 0.5
-            disparity_change = disparity_r - prev_disparity
-            if abs(disparity_change) >= 0.5:
-                d = "인버스"
-            else:
-                d = "현금보유" # 인버스 진입 조건 미충족 시 현금보유
-        recent.at[recent.index[i], "판단"] = d # 계산된 판단값을 DataFrame에 저장
-
-    # 오버나잇 전략 적용 (기존 '현금보유' 판단에 오버나잇 조건 충족 시 '오버나잇'으로 변경)
-    # prev_day, prev2_day 정의가 필요한 부분
-    # 주의: create_strategy_list_html에 전달되는 prev_day, prev2_day는
-    # main 로직의 df.iloc[-1], df.iloc[-2]와 다름.
-    # main 로직에서 사용되는 prev_day, prev2_day는 여기에서 정의되어야 합니다.
-    prev_day = df.iloc[-1]   # 메인 출력부에서 사용될 오늘(가장 최신) 데이터
-    prev2_day = df.iloc[-2]  # 메인 출력부에서 사용될 어제 데이터
-
-    # 오버나잇 전략 적용 - 첫 번째 블록 (기존 로직)
-    for i in range(len(recent) - 6, len(recent) - 1):
-        if recent.iloc[i]["판단"] == "현금보유":
-            today_row = recent.iloc[i + 1]
-            yesterday_row = recent.iloc[i]
-
-            UR = float(today_row["High"]) - float(today_row["Open"])
-            LR_today = float(today_row["Open"]) - float(today_row["Low"])
-            LR_yesterday = float(yesterday_row["Open"]) - float(yesterday_row["Low"])
-            
-            if UR > max(LR_today, LR_yesterday):
-                recent.at[recent.index[i], "판단"] = "오버나잇"
-
-# 오버나잇 전략 적용 (기존 '현금보유' 판단에 오버나잇 조건 충족 시 '오버나잇'으로 변경)
-    # 🎯 수정: 루프 범위를 `range(1, 6)`으로 변경하고 변수명을 조정했습니다.
-    if len(recent) < 3:
-        st.warning("데이터가 충분하지 않습니다.")
-    else:
-        max_check_days = min(6, len(recent) - 2)  # 최대 6일, 하지만 데이터 길이 고려
-
-        for i in range(1, max_check_days + 1):  # 데이터가 있는 만큼만 검토
-            if i + 1 >= len(recent):
-                break
-            
-            if recent.iloc[i]["판단"] == "현금보유":
-                today_row = recent.iloc[i + 1]
-                yesterday_row = recent.iloc[i]
-
-                UR = float(today_row["High"]) - float(today_row["Open"])
-                LR_today = float(today_row["Open"]) - float(today_row["Low"])
-                LR_yesterday = float(yesterday_row["Open"]) - float(yesterday_row["Low"])
-
-                if UR > max(LR_today, LR_yesterday):
-                    recent.at[recent.index[i], "판단"] = "오버나잇"
-
-    # 3-3. 전일/당일 전략 기반 최종 액션(매수/매도) 판단
+    # 전략 판단 구간의 첫 행은 전일 비교 대상이 없으므로 판단 없음
+    recent.iloc[0, recent.columns.get_loc("판단")] = None
+
+    # 오버나잇 검토 구간: 최근 5일(마지막 날 제외) 및 앞쪽 최대 6일
+    review = np.zeros(len(recent), dtype=bool)
+    review[max(0, len(recent) - 6):len(recent) - 1] = True
+    if len(recent) >= 3:
+        review[1:min(6, len(recent) - 2) + 1] = True
+
+    # 3-1. 기본 전략 판단에 오버나잇 적용 -> 매수/매도 액션 및 신호 지속일
+    # 규칙은 strategy_rules.LEVERAGE_SIGNAL_RULES 참고
+    return LEVERAGE_SIGNAL_RULES.apply(recent, 오버나잇_검토=review)
+
+def calculate_leverage_actions(recent):
+    # 3-3. 전일/당일 전략 기반 최종 액션(매수/매도) 및 3-4. 신호 연속 일수
+    today_row = recent.iloc[-1]
     prev_decision = recent.iloc[-2]["판단"] # 전일의 최종 전략 판단
-    decision = recent.iloc[-1]["판단"] # 당일의 최종 전략 판단 (UI 출력에 사용될 최종 판단)
-
-    # 3-3-1. '오버나잇'을 '레버리지' 포지션으로 간주하여 액션 판단 간소화
-    effective_prev_position = "레버리지" if prev_decision in ["레버리지", "오버나잇"] else prev_decision
-    effective_today_position = "레버리지" if decision in ["레버리지", "오버나잇"] else decision
-
-    # 3-3-2. 전일-당일 포지션 조합에 따른 매수/매도 액션 매핑 테이블
-    action_map = {
-        ("현금보유", "레버리지"): ("레버리지", "없음"),
-        ("현금보유", "인버스"): ("인버스", "없음"),
-        ("레버리지", "현금보유"): ("없음", "레버리지"),
-        ("인버스", "현금보유"): ("없음", "인버스"),
-        ("레버리지", "인버스"): ("인버스", "레버리지"),
-        ("인버스", "레버리지"): ("레버리지", "인버스"),
-    }
-
-    # 3-3-3. 매핑 테이블에서 현재 상황에 맞는 매수/매도 액션 조회
-    매수액션, 매도액션 = action_map.get((effective_prev_position, effective_today_position), ("없음", "없음"))
-    
-    # 🎯 추가: 매도가 "레버리지"일 때 전일 이격도에 따라 시가/종가 구분
-    if 매수액션 == "레버리지":
-        if decision == "오버나잇":  # 오버나잇이면 종가 매수
-            매수액션 = "레버리지 종가"
-        else:  # 그 외는 시가 매수
-            매수액션 = "레버리지 시가"
-
-    if 매도액션 == "레버리지":
-        prev_disparity = float(recent.iloc[-2]["Disparity"])  # 전일 이격도
-        if prev_disparity > 106:
-            매도액션 = "레버리지 종가"
-        else:
-            매도액션 = "레버리지 시가"
-
-    # 3-3-4. 예외 처리: 전일 '레버리지'이고 당일 '오버나잇'일 경우 (포지션 유지 의미)
-    if prev_decision == "레버리지" and decision == "오버나잇":
-        매수액션 = "레버리지 종가"
-        # 오버나잇의 경우에도 이격도 조건 적용
-        prev_disparity = float(recent.iloc[-2]["Disparity"])
-        if prev_disparity > 106:
-            매도액션 = "레버리지 종가"
-        else:
-            매도액션 = "레버리지 시가"
-
-    # 3-4. 현재 전략 신호의 연속 일수 계산
-    signal_streak = 0
-    if len(recent) > 1:
-        today_signal = recent['판단'].iloc[-1]
-        signal_streak = 1 # 오늘을 포함
-        for i in range(len(recent) - 2, -1, -1): # 마지막에서 두 번째 날부터 역순으로 탐색
-            if recent['판단'].iloc[i] == today_signal:
-                signal_streak += 1
-            else:
-                break # 다른 신호가 나오면 중단
-
-# === 4. Streamlit UI 구성 및 출력 ===
+    decision = today_row["판단"] # 당일의 최종 전략 판단 (UI 출력에 사용될 최종 판단)
+    return decision, prev_decision, today_row["매수액션"], today_row["매도액션"], int(today_row["신호지속일"])
 
 # 4-2. 오버나잇 조건 변경시 오버나잇으로 헤더 표기
-def get_header_card_display_vars(recent, prev_day, prev2_day, decision, prev_decision, signal_streak, 매수액션, 매도액션, action_map):
-    display_date_row = prev2_day
-    display_prev_date_row = prev2_day
+def get_header_card_display_vars(recent, decision, signal_streak, 매수액션, 매도액션):
+    # 기본: 최근일(오늘) 기준 값 (decision 등은 recent.iloc[-1]의 값)
+    display_date_row = recent.iloc[-1]
+    display_prev_date_row = recent.iloc[-2]
     display_decision = decision
     display_signal_streak = signal_streak
     display_매수액션 = 매수액션
     display_매도액션 = 매도액션
 
-    # 조건: 최근일(오늘)의 전날 (recent.iloc[-2])이 "오버나잇"인 경우
+    # 조건: 최근일(오늘)의 전날 (recent.iloc[-2])이 "오버나잇"인 경우 전날 기준 값으로 표기
     if recent.iloc[-2]["판단"] == "오버나잇":
         display_date_row = recent.iloc[-2]
         display_prev_date_row = recent.iloc[-3]
-        display_decision = recent.iloc[-2]["판단"]
-
-        # 신호 지속일 재계산
-        temp_signal_streak = 0
-        if len(recent) >= 3:
-            target_signal = recent.iloc[-2]["판단"]
-            temp_signal_streak = 1
-            for k in range(len(recent) - 3, -1, -1): 
-                if recent.iloc[k]["판단"] == target_signal:
-                    temp_signal_streak += 1
-                else:
-                    break
-        display_signal_streak = temp_signal_streak
-
-        # 매수/매도 액션 재계산
-        effective_prev_position_alt = "레버리지" if display_prev_date_row["판단"] in ["레버리지", "오버나잇"] else display_prev_date_row["판단"]
-        effective_today_position_alt = "레버리지" if display_date_row["판단"] in ["레버리지", "오버나잇"] else display_date_row["판단"]
-
-        display_매수액션, display_매도액션 = action_map.get((effective_prev_position_alt, effective_today_position_alt), ("없음", "없음"))
-        
-        # 🎯 매수액션 표기: 당일이 오버나잇이면 종가, 아니면 시가
-        if display_매수액션 == "레버리지":
-            if display_date_row["판단"] == "오버나잇":  # 당일이 오버나잇이면 종가 매수
-                display_매수액션 = "레버리지 종가"
-            else:  # 그 외는 시가 매수
-                display_매수액션 = "레버리지 시가"
-
-        # 매도가 "레버리지"일 때 이격도 조건 적용
-        if display_매도액션 == "레버리지":
-            alt_prev_disparity = float(display_prev_date_row["Disparity"])
-            if alt_prev_disparity > 106:
-                display_매도액션 = "레버리지 종가"
-            else:
-                display_매도액션 = "레버리지 시가"
+        display_decision = display_date_row["판단"]
+        display_signal_streak = int(display_date_row["신호지속일"])
+        display_매수액션 = display_date_row["매수액션"]
+        display_매도액션 = display_date_row["매도액션"]
 
-        if display_prev_date_row["판단"] == "레버리지" and display_date_row["판단"] == "오버나잇":
-            display_매수액션 = "레버리지 종가"
-            alt_prev_disparity = float(display_prev_date_row["Disparity"])
-            if alt_prev_disparity > 106:
-                display_매도액션 = "레버리지 종가"
-            else:
-                display_매도액션 = "레버리지 시가"
-            
     return display_date_row, display_prev_date_row, display_decision, display_signal_streak, display_매수액션, display_매도액션
 
-# 4-3. 상단 헤더 카드 출력: 오늘 날짜, 최종 전략, 신호 지속일, 매수/매도 액션 요약
-
-(display_date_row, display_prev_date_row, display_decision,
-display_signal_streak, display_매수액션, display_매도액션) = \
-    get_header_card_display_vars(recent, prev_day, prev2_day, decision, prev_decision, signal_streak, 매수액션, 매도액션, action_map)
-
-# 헤더 날짜는 전략 판단 다음날로 표기
-header_color = get_color(display_decision)
-today = datetime.today().date() 
-next_biz_day = next_business_day(today)
-today_str = next_biz_day.strftime("%Y-%m-%d %A").replace("Monday","월요일").replace("Tuesday","화요일").replace("Wednesday","수요일").replace("Thursday","목요일").replace("Friday","금요일")
-
-# 상단 헤더 카드 출력:
-st.markdown(f"""
-<div style="background-color:{header_color}; border-radius:16px; padding:20px; color:white; text-align:center; margin-bottom:20px;">
-    <div style="font-size:16px; opacity:0.9; margin-bottom: 0;">{today_str}</div>
-    <div style="font-size:32px; font-weight:bold; margin-top: 0;">{display_decision}</div>
-    <div style="font-size:16px; font-weight:normal; opacity:0.8; margin-bottom:0;">({display_signal_streak}일째)</div>
-    <hr style="border:none; border-top:1px solid #FFFFFF50; margin: 8px 0 12px 0;">
-    <div style="display:flex; justify-content:space-around; text-align:center;">
-        <div>
-            <div style="font-size:14px; opacity:0.8;">매수</div>
-            <div style="font-size:18px; font-weight:bold;">{display_매수액션}</div>
-        </div>
-        <div>
-            <div style="font-size:14px; opacity:0.8;">매도</div>
-            <div style="font-size:18px; font-weight:bold;">{display_매도액션}</div>
-        </div>
-    </div>
-</div>
-""", unsafe_allow_html=True)
-
-# 4-4. 전략 리스트를 details 태그로 묶기
-strategy_list_html = create_strategy_list_html(recent, prev_day, prev2_day)
-
-combined_info_html = f"""
-<details style='background-color: white; border: 1px solid #e0e0e0; border-radius: 8px; padding: 0; margin-bottom: 16px;'>
-<summary style='background-color: #f8f9fa; padding: 12px 16px; font-weight: 600; cursor: pointer; list-style: none; font-size: 15px;'>
-📊 전략리스트
-</summary>
-<div style="padding: 12px;">
-    {strategy_list_html}
-</div>
-</details>
-"""
-
-st.markdown(combined_info_html, unsafe_allow_html=True)
-
 # ==============================================================================
-# 오버나잇 조건 수동 계산기 (간결 버전)
+# 오버나잇 계산기 / 코스닥150 레버리지 입력값 계산 함수
 # ==============================================================================
-st.write("")
-# details 태그를 사용한 오버나잇 계산기
+def get_overnight_calculator_vars(df):
+    if df.empty or len(df) < 2:
+        return None
 
-prev2_day = df.iloc[-2]
-
-# HTML details 태그로 오버나잇 계산기 생성
-if not df.empty and len(df) >= 2:
+    prev2_day = df.iloc[-2]
     calculator_lr_yesterday = float(prev2_day["Open"]) - float(prev2_day["Low"])
 
     # 오늘 데이터 기본값
@@ -523,160 +265,90 @@ if not df.empty and len(df) >= 2:
     # 계산
     ur = today_high - today_open
     lr_today = today_open - today_low
-    lr_yesterday = calculator_lr_yesterday 
-
-    부등호_calc = ">" if ur > max(lr_today, lr_yesterday) else "≤"
-    calc_reason_text = f"UR {ur:,.0f}원 {부등호_calc} LR MAX({lr_today:,.0f}원, {lr_yesterday:,.0f}원)"
-
-    # 결과에 따른 스타일 설정
-    if ur > max(lr_today, lr_yesterday):
-        result_color = "#28a745"  # 녹색
-        result_status = "충족"
-    else:
-        result_color = "#fd7e14"  # 주황색
-        result_status = "미충족"
-
-    # HTML details 태그로 결과 표시
-    calculator_details = f"""
-    <details style='background-color: white; border: 1px solid #e0e0e0; border-radius: 8px; padding: 0;'>
-    <summary style='background-color: #f8f9fa; padding: 12px 16px; font-weight: 600; cursor: pointer; list-style: none; font-size: 15px;'>
-    📊 오버나잇 계산기 결과
-    </summary>
-    <div style='padding: 16px; font-size: 0.9rem; line-height: 1.8;'>
-    <div style='color: {result_color}; font-weight: 600; margin-bottom: 8px;'>
-    {result_status}: {calc_reason_text}
-    </div>
-    <div style='font-size: 0.8rem; color: #666;'>
-    시가: {today_open:,.0f}원 | 고가: {today_high:,.0f}원 | 저가: {today_low:,.0f}원<br>
-    UR: {ur:,.0f}원 | LR(오늘): {lr_today:,.0f}원 | LR(어제): {lr_yesterday:,.0f}원
-    </div>
-    </div>
-    </details>
-    """
-
-    st.markdown(calculator_details, unsafe_allow_html=True)
-
-else:
-    # 데이터 부족 시 간단한 정보 표시
-    info_details = f"""
-    <details style='background-color: white; border: 1px solid #e0e0e0; border-radius: 8px; padding: 0; margin-top: 16px;'>
-    <summary style='background-color: #f8f9fa; padding: 12px 16px; font-weight: 600; cursor: pointer; list-style: none; font-size: 15px;'>
-    📊 오버나잇 계산기
-    </summary>
-    <div style='padding: 16px; font-size: 0.9rem; line-height: 1.8; color: #666;'>
-    데이터가 부족합니다. 최소 2일의 데이터가 필요합니다.
-    </div>
-    </details>
-    """
-    
-    st.markdown(info_details, unsafe_allow_html=True)
-
-
-# ==============================================================================
-# 코스닥150 레버리지 전략 섹션 (UI 출력 부분)
-# ==============================================================================
-st.write("")
+    lr_yesterday = calculator_lr_yesterday
+
+    return {
+        "today_open": today_open,
+        "today_high": today_high,
+        "today_low": today_low,
+        "ur": ur,
+        "lr_today": lr_today,
+        "lr_yesterday": lr_yesterday,
+        "is_met": ur > max(lr_today, lr_yesterday),
+    }
 
-# 코스닥150 레버리지 전략 섹션 수정
-if not df_kosdaq.empty and len(df_kosdaq) >= 2:
+def get_kosdaq_display_vars(df_kosdaq, df, is_before_market_open):
+    if df_kosdaq.empty or len(df_kosdaq) < 2:
+        return None
 
-    kst = pytz.timezone('Asia/Seoul')
-    now_kst = datetime.now(kst)
-    current_hour = now_kst.hour
-
-    # 장 시작 전(00:00~08:59) 여부 확인
-    is_before_market_open = current_hour < 9
-    
     if is_before_market_open:
         # 🌙 장 시작 전: 전일 데이터로 오늘의 K_B, K_S 미리 계산
         kosdaq_yesterday = df_kosdaq.iloc[-1]   # 어제 (마지막 거래일)
         kosdaq_day_before = df_kosdaq.iloc[-2]  # 그저께
-        leverage_yesterday = df.iloc[-1]
         leverage_day_before = df.iloc[-2]
-        
+
         # 전일 이격도 (매도 조건용)
         prev_kosdaq_disparity = float(kosdaq_day_before["Disparity"])
         prev_leverage_disparity = float(leverage_day_before["Disparity"])
 
-        
         # 오늘의 K_B, K_S 계산에 사용할 데이터
         prev_high = float(kosdaq_yesterday["High"])      # 어제 고가
         prev_low = float(kosdaq_yesterday["Low"])        # 어제 저가
         today_open = float(kosdaq_yesterday["Close"])    # 어제 종가를 예상 시가로 사용
-
-        close_open_diffs = []
-        start_idx = max(0, len(df_kosdaq) - 11)
-        for j in range(start_idx, len(df_kosdaq) - 1):
-            close_val = float(df_kosdaq.iloc[j]["Close"])
-            open_val = float(df_kosdaq.iloc[j]["Open"])
-            diff = max(0, close_val - open_val)
-            close_open_diffs.append(diff)
-        
-        max_close_open_10 = max(close_open_diffs) if close_open_diffs else 0
-
-        # 현재가는 어제 종가
-        current_price = float(kosdaq_yesterday["Close"])
         today_high = float(kosdaq_yesterday["High"])     # 참고용
         today_low = float(kosdaq_yesterday["Low"])       # 참고용
-        
+
         # 현재 포지션 정보
         current_position = kosdaq_yesterday["포지션"]
         prev_position = kosdaq_day_before["포지션"]
-        
+
     else:
         # 📈 장 시작 후: 당일 시가 기준으로 K_B, K_S 계산
         kosdaq_today = df_kosdaq.iloc[-1]       # 오늘 (최신 데이터)
         kosdaq_yesterday = df_kosdaq.iloc[-2]   # 어제
-        leverage_today = df.iloc[-1]
         leverage_yesterday = df.iloc[-2]
-        
+
         # 전일 이격도 (매도 조건용)
         prev_kosdaq_disparity = float(kosdaq_yesterday["Disparity"])
         prev_leverage_disparity = float(leverage_yesterday["Disparity"])
-        
+
         # 오늘의 K_B, K_S 계산에 사용할 데이터
         prev_high = float(kosdaq_yesterday["High"])      # 어제 고가
         prev_low = float(kosdaq_yesterday["Low"])        # 어제 저가
         today_open = float(kosdaq_today["Open"])         # 오늘 시가
         today_high = float(kosdaq_today["High"])         # 오늘 고가
         today_low = float(kosdaq_today["Low"])           # 오늘 저가
-        current_price = float(kosdaq_today["Close"])     # 현재가
-        
-        # 🎯 추가: 직전 10개 영업일의 max(close - open) 계산
-        close_open_diffs = []
-        start_idx = max(0, len(df_kosdaq) - 11)  # 오늘 제외하고 과거 10개
-        for j in range(start_idx, len(df_kosdaq) - 1):
-            close_val = float(df_kosdaq.iloc[j]["Close"])
-            open_val = float(df_kosdaq.iloc[j]["Open"])
-            diff = max(0, close_val - open_val)
-            close_open_diffs.append(diff)
-        
-        max_close_open_10 = max(close_open_diffs) if close_open_diffs else 0
 
         # 현재 포지션 정보
         current_position = kosdaq_today["포지션"]
         prev_position = kosdaq_yesterday["포지션"]
 
-    
+    # 🎯 추가: 직전 10개 영업일의 max(close - open) 계산 (마지막 행 제외)
+    close_open_diffs = []
+    start_idx = max(0, len(df_kosdaq) - 11)
+    for j in range(start_idx, len(df_kosdaq) - 1):
+        close_val = float(df_kosdaq.iloc[j]["Close"])
+        open_val = float(df_kosdaq.iloc[j]["Open"])
+        diff = max(0, close_val - open_val)
+        close_open_diffs.append(diff)
+
+    max_close_open_10 = max(close_open_diffs) if close_open_diffs else 0
+
     # 공통: 이격도 충족 여부
     disparity_met = prev_kosdaq_disparity <= 106 and prev_leverage_disparity <= 106
-    disparity_status = "✓ 충족" if disparity_met else "✗ 미충족"
-    
+
     # K_B, K_S 계산
     prev_range = prev_high - prev_low
     range_multiplier_buy = prev_range * 0.4   # 매수용 (K_B)
     range_multiplier_sell = prev_range * 0.3  # 매도용 (K_S)
-    
+
     K_B = np.ceil(today_open + min(range_multiplier_buy, max_close_open_10))   # 매수 기준가
     K_S = np.floor(today_open - range_multiplier_sell)  # 매도 기준가
-    
+
     # 조건 충족 여부
     kb_met = (today_low <= K_B <= today_high) if not is_before_market_open else False
     ks_met = (today_low <= K_S <= today_high) if not is_before_market_open else False
-    
-    kb_status = "✓ 충족" if kb_met else "✗ 미충족" if not is_before_market_open else "⏳ 대기"
-    ks_status = "✓ 충족" if ks_met else "✗ 미충족" if not is_before_market_open else "⏳ 대기"
-    
+
     # 오늘 액션 판단
     today_action = "없음"
     if not is_before_market_open:
@@ -693,9 +365,371 @@ if not df_kosdaq.empty and len(df_kosdaq) >= 2:
                 today_action = "매도 대기"
             else:
                 today_action = "이격도 미충족"
-    
+
+    return {
+        "is_before_market_open": bool(is_before_market_open),
+        "current_position": current_position,
+        "prev_position": prev_position,
+        "today_action": today_action,
+        "prev_kosdaq_disparity": prev_kosdaq_disparity,
+        "prev_leverage_disparity": prev_leverage_disparity,
+        "disparity_met": bool(disparity_met),
+        "prev_high": prev_high,
+        "prev_low": prev_low,
+        "today_open": today_open,
+        "max_close_open_10": float(max_close_open_10),
+        "range_multiplier_buy": range_multiplier_buy,
+        "range_multiplier_sell": range_multiplier_sell,
+        "K_B": float(K_B),
+        "K_S": float(K_S),
+        "kb_met": bool(kb_met),
+        "ks_met": bool(ks_met),
+    }
+
+# ==============================================================================
+# 신호 스냅샷 (백그라운드 작업이 기록하고 페이지는 읽기만 함)
+# 데이터 조회와 전략 계산은 `python "LV Strategy_KQ.py" --write-snapshot`을
+# cron 등으로 주기 실행해 수행하고, Streamlit 페이지는 스냅샷만 읽어 렌더링합니다.
+# ==============================================================================
+
+# === 1. 설정값 정의 ===
+LEVERAGE_TICKER = "122630"  # KODEX 레버리지
+INVERSE_TICKER = "252670"   # KODEX 인버스
+KOSDAQ_LEVERAGE_TICKER = "233740"  # KODEX 코스닥150 레버리지
+
+SNAPSHOT_VERSION = 1  # 스냅샷 구조가 바뀌면 증가 (이전 버전 파일은 무시됨)
+SNAPSHOT_PATH = os.environ.get(
+    "LV_SNAPSHOT_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "signal_snapshot.json"),
+)
+SNAPSHOT_STALE_MINUTES = 30  # 이 시간보다 오래된 스냅샷은 페이지에 경고 표시
+LEVERAGE_SIGNAL_LOOKBACK = 39  # 레버리지 신호가 의존하는 과거 봉 수 (이력 기록 시 해시 구간)
+SIGNAL_STORE_PATH = os.environ.get(
+    "LV_SIGNAL_STORE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "signal_history.sqlite"),
+)
+
+def fetch_price_data(ticker, start_date, end_date):
+    df = fdr.DataReader(ticker, start_date, end_date)
+    # 다운로드된 데이터프레임의 컬럼이 MultiIndex일 경우 단일 레벨로 평탄화
+    if isinstance(df.columns, pd.MultiIndex):
+        df.columns = df.columns.get_level_values(0)
+    return df
+
+def build_snapshot(fetch=fetch_price_data, store=None, frames=None):
+    """
+    데이터를 조회하고 두 전략을 계산해 UI에 필요한 값을 JSON 직렬화 가능한 dict로 반환합니다.
+    레버리지 데이터가 부족하면 None을 반환합니다.
+    fetch는 (ticker, start_date, end_date)를 받아 OHLCV DataFrame을 반환하는 함수입니다.
+    store(SignalStore)를 주면 두 전략의 마지막 봉 신호와 헤더 카드에 표시된 값을 이력에 기록합니다.
+    frames(dict)를 주면 지표 계산 결과를 보관해 다음 호출에서 바뀐 구간만 다시 계산합니다.
+    """
+    kst = pytz.timezone('Asia/Seoul')
+    now_kst = datetime.now(kst)
+
+    # 데이터 조회 기간 설정 (오늘 기준 과거 60일 ~ 미래 1일)
+    today = datetime.now()
+    start_date = today - timedelta(days=60)
+    end_date = today + timedelta(days=1)
+
+    # === 2. 데이터 로드 및 전처리 ===
+    df_leverage = fetch(LEVERAGE_TICKER, start_date, end_date)
+    kosdaq_bars = fetch(KOSDAQ_LEVERAGE_TICKER, start_date, end_date)
+
+    # 데이터 유효성 검사: 데이터가 없거나 전략 계산에 필요한 최소 일수 미만일 경우
+    if df_leverage.empty or len(df_leverage) < 22: # 최소 20일 이동평균 + 추가 데이터 필요
+        return None
+
+    # 레버리지 데이터를 메인으로 사용 (기존 로직 유지)
+    df = prepare_leverage_indicators(get_indicator_frame(frames, LEVERAGE_TICKER, df_leverage))
+
+    # 코스닥150 레버리지 전략 계산
+    df_kosdaq = calculate_kosdaq_strategy(get_indicator_frame(frames, KOSDAQ_LEVERAGE_TICKER, kosdaq_bars), df_leverage, frames)
+
+    # === 3. 핵심 전략 로직 (전략 판단 및 액션 결정) ===
+    recent = calculate_leverage_strategy(df)
+    decision, prev_decision, 매수액션, 매도액션, signal_streak = calculate_leverage_actions(recent)
+
+    (display_date_row, display_prev_date_row, display_decision,
+    display_signal_streak, display_매수액션, display_매도액션) = \
+        get_header_card_display_vars(recent, decision, signal_streak, 매수액션, 매도액션)
+
+    if store is not None:
+        # 검토 구간/첫 행 처리로 값이 바뀌는 앞쪽 행은 제외하고 확정된 마지막 봉과 헤더 카드 값만 기록
+        # 해시 구간: 레버리지는 최근 20일 판단에 필요한 40봉(20일 이동평균 + 전일 비교), 코스닥은 상태머신이 시작되는 처음부터
+        latest_date = recent.index[-1]
+        store.record(
+            signal_records(recent.tail(1), LEVERAGE_TICKER, "leverage", "판단", ["매수액션", "매도액션", "Disparity"],
+                           now_kst, bars=df_leverage, lookback=LEVERAGE_SIGNAL_LOOKBACK)
+            + signal_records(df_kosdaq.tail(1), KOSDAQ_LEVERAGE_TICKER, "kosdaq", "포지션", ["K_B", "K_S"],
+                             now_kst, bars=kosdaq_bars)
+            + [make_record(LEVERAGE_TICKER, HEADER_STRATEGY, display_date_row.name, display_decision,
+                           bar_window_hash(df_leverage, latest_date, LEVERAGE_SIGNAL_LOOKBACK),
+                           {"신호지속일": int(display_signal_streak), "매수액션": display_매수액션, "매도액션": display_매도액션},
+                           now_kst)]
+        )
+
+    # 헤더 날짜는 전략 판단 다음날로 표기
+    next_biz_day = next_business_day(now_kst.date())
+
+    # 장 시작 전(00:00~08:59) 여부 확인
+    is_before_market_open = now_kst.hour < 9
+
+    return {
+        "version": SNAPSHOT_VERSION,
+        "generated_at": now_kst.isoformat(),
+        "header": {
+            "date": next_biz_day.isoformat(),
+            "signal_date": pd.Timestamp(display_date_row.name).strftime("%Y-%m-%d"),
+            "decision": display_decision,
+            "signal_streak": int(display_signal_streak),
+            "매수액션": display_매수액션,
+            "매도액션": display_매도액션,
+        },
+        "strategy_rows": build_strategy_rows(recent),
+        "overnight_calculator": get_overnight_calculator_vars(df),
+        "kosdaq": get_kosdaq_display_vars(df_kosdaq, df, is_before_market_open),
+    }
+
+def write_snapshot(snapshot, path=SNAPSHOT_PATH):
+    # 페이지가 쓰기 도중의 파일을 읽지 않도록 임시 파일에 쓴 뒤 교체
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(snapshot, f, ensure_ascii=False, separators=(",", ":"))
+        # mkstemp는 0600으로 만들므로, 다른 사용자로 실행되는 Streamlit 서버도 읽을 수 있게 권한 조정
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+def load_snapshot(path=SNAPSHOT_PATH):
+    """스냅샷 파일을 읽습니다. 없거나 손상되었거나 버전이 다르면 None을 반환합니다."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            snapshot = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(snapshot, dict) or snapshot.get("version") != SNAPSHOT_VERSION:
+        return None
+    return snapshot
+
+SNAPSHOT_REFRESH_SECONDS = 300  # --loop 모드의 갱신 주기
+
+def refresh_snapshot(store, frames=None, fetch=fetch_price_data, path=SNAPSHOT_PATH):
+    """
+    스냅샷을 계산해 신호 이력에 기록하고 파일로 씁니다. 데이터가 부족하면 파일을 그대로 두고 False를 반환합니다.
+    frames(dict)를 갱신마다 재사용하면 새로 추가/수정된 봉 이후의 지표만 다시 계산합니다.
+    """
+    snapshot = build_snapshot(fetch, store=store, frames=frames)
+    if snapshot is None:
+        return False
+    write_snapshot(snapshot, path)
+    return True
+
+# ==============================================================================
+# 세션 간 공유 상태 (동시 요청 단일 실행)
+# Streamlit은 브라우저 세션마다 스크립트를 다시 실행하므로, 시세 조회와 지표 계산은
+# 프로세스 전역 SharedState를 통해 한 번만 수행하고 결과를 모든 세션이 공유합니다.
+# ==============================================================================
+SHARED_STATE_BUCKET_SECONDS = 300  # 같은 버킷(5분) 안의 요청은 한 번 계산한 결과를 재사용
+
+class SharedState:
+    """
+    같은 키에 대한 동시 요청은 한 스레드만 계산하고 나머지는 그 결과를 기다립니다 (single-flight).
+    완료된 결과는 같은 종류의 새 버킷이 요청될 때까지 보관하며, 실패한 결과는 보관하지 않습니다.
+    """
+    def __init__(self, fetch=fetch_price_data, bucket_seconds=SHARED_STATE_BUCKET_SECONDS):
+        self.fetch = fetch
+        self.bucket_seconds = bucket_seconds
+        self._lock = threading.Lock()
+        self._futures = {}  # (종류, 버킷) -> 진행 중이거나 완료된 Future
+        self._frames = {}  # 종목별 IndicatorFrame (버킷이 바뀌어도 유지해 바뀐 봉만 재계산)
+        self._frames_lock = threading.Lock()
+
+    def single_flight(self, key, compute):
+        with self._lock:
+            future = self._futures.get(key)
+            is_leader = future is None
+            if is_leader:
+                # 같은 종류의 이전 버킷 결과는 제거
+                for old_key in [k for k in self._futures if k[0] == key[0]]:
+                    del self._futures[old_key]
+                future = Future()
+                self._futures[key] = future
+
+        if is_leader:
+            try:
+                future.set_result(compute())
+            except BaseException as e:
+                with self._lock:
+                    if self._futures.get(key) is future:
+                        del self._futures[key]
+                future.set_exception(e)
+        return future.result()
+
+    def get_snapshot(self):
+        bucket = int(time.time() // self.bucket_seconds)
+        return self.single_flight(("snapshot", bucket), self._build_snapshot)
+
+    def _build_snapshot(self):
+        # 이전 버킷의 계산이 아직 진행 중일 수 있으므로 지표 캐시는 한 번에 하나만 사용
+        with self._frames_lock:
+            return build_snapshot(self.fetch, frames=self._frames)
+
+@st.cache_resource
+def get_shared_state():
+    return SharedState()
+
+# ==============================================================================
+# Streamlit UI 구성 및 출력 (스냅샷 렌더링)
+# ==============================================================================
+def render_snapshot_status(snapshot, is_live=False):
+    kst = pytz.timezone('Asia/Seoul')
+    generated_at = datetime.fromisoformat(snapshot["generated_at"])
+    age_minutes = int((datetime.now(kst) - generated_at).total_seconds() // 60)
+
+    if is_live:
+        st.caption(f"🔄 스냅샷이 없어 직접 계산했습니다 ({generated_at:%m-%d %H:%M} 기준)")
+    elif age_minutes > SNAPSHOT_STALE_MINUTES:
+        st.caption(f"⚠️ 데이터가 오래되었습니다: {generated_at:%m-%d %H:%M} 기준 ({age_minutes}분 전)")
+    else:
+        st.caption(f"🕒 {generated_at:%m-%d %H:%M} 기준 ({age_minutes}분 전)")
+
+def render_header_card(header):
+    # 4-3. 상단 헤더 카드 출력: 오늘 날짜, 최종 전략, 신호 지속일, 매수/매도 액션 요약
+    header_color = get_color(header["decision"])
+    next_biz_day = datetime.strptime(header["date"], "%Y-%m-%d")
+    today_str = next_biz_day.strftime("%Y-%m-%d %A").replace("Monday","월요일").replace("Tuesday","화요일").replace("Wednesday","수요일").replace("Thursday","목요일").replace("Friday","금요일")
+
+    st.markdown(f"""
+<div style="background-color:{header_color}; border-radius:16px; padding:20px; color:white; text-align:center; margin-bottom:20px;">
+    <div style="font-size:16px; opacity:0.9; margin-bottom: 0;">{today_str}</div>
+    <div style="font-size:32px; font-weight:bold; margin-top: 0;">{header["decision"]}</div>
+    <div style="font-size:16px; font-weight:normal; opacity:0.8; margin-bottom:0;">({header["signal_streak"]}일째)</div>
+    <hr style="border:none; border-top:1px solid #FFFFFF50; margin: 8px 0 12px 0;">
+    <div style="display:flex; justify-content:space-around; text-align:center;">
+        <div>
+            <div style="font-size:14px; opacity:0.8;">매수</div>
+            <div style="font-size:18px; font-weight:bold;">{header["매수액션"]}</div>
+        </div>
+        <div>
+            <div style="font-size:14px; opacity:0.8;">매도</div>
+            <div style="font-size:18px; font-weight:bold;">{header["매도액션"]}</div>
+        </div>
+    </div>
+</div>
+""", unsafe_allow_html=True)
+
+def render_strategy_list(strategy_rows):
+    # 4-4. 전략 리스트를 details 태그로 묶기
+    strategy_list_html = create_strategy_list_html(strategy_rows)
+
+    combined_info_html = f"""
+<details style='background-color: white; border: 1px solid #e0e0e0; border-radius: 8px; padding: 0; margin-bottom: 16px;'>
+<summary style='background-color: #f8f9fa; padding: 12px 16px; font-weight: 600; cursor: pointer; list-style: none; font-size: 15px;'>
+📊 전략리스트
+</summary>
+<div style="padding: 12px;">
+    {strategy_list_html}
+</div>
+</details>
+"""
+
+    st.markdown(combined_info_html, unsafe_allow_html=True)
+
+def render_overnight_calculator(calc):
+    # ==========================================================================
+    # 오버나잇 조건 수동 계산기 (간결 버전)
+    # ==========================================================================
+    st.write("")
+
+    # HTML details 태그로 오버나잇 계산기 생성
+    if calc is not None:
+        ur = calc["ur"]
+        lr_today = calc["lr_today"]
+        lr_yesterday = calc["lr_yesterday"]
+
+        부등호_calc = ">" if calc["is_met"] else "≤"
+        calc_reason_text = f"UR {ur:,.0f}원 {부등호_calc} LR MAX({lr_today:,.0f}원, {lr_yesterday:,.0f}원)"
+
+        # 결과에 따른 스타일 설정
+        if calc["is_met"]:
+            result_color = "#28a745"  # 녹색
+            result_status = "충족"
+        else:
+            result_color = "#fd7e14"  # 주황색
+            result_status = "미충족"
+
+        # HTML details 태그로 결과 표시
+        calculator_details = f"""
+    <details style='background-color: white; border: 1px solid #e0e0e0; border-radius: 8px; padding: 0;'>
+    <summary style='background-color: #f8f9fa; padding: 12px 16px; font-weight: 600; cursor: pointer; list-style: none; font-size: 15px;'>
+    📊 오버나잇 계산기 결과
+    </summary>
+    <div style='padding: 16px; font-size: 0.9rem; line-height: 1.8;'>
+    <div style='color: {result_color}; font-weight: 600; margin-bottom: 8px;'>
+    {result_status}: {calc_reason_text}
+    </div>
+    <div style='font-size: 0.8rem; color: #666;'>
+    시가: {calc["today_open"]:,.0f}원 | 고가: {calc["today_high"]:,.0f}원 | 저가: {calc["today_low"]:,.0f}원<br>
+    UR: {ur:,.0f}원 | LR(오늘): {lr_today:,.0f}원 | LR(어제): {lr_yesterday:,.0f}원
+    </div>
+    </div>
+    </details>
+    """
+
+        st.markdown(calculator_details, unsafe_allow_html=True)
+
+    else:
+        # 데이터 부족 시 간단한 정보 표시
+        info_details = f"""
+    <details style='background-color: white; border: 1px solid #e0e0e0; border-radius: 8px; padding: 0; margin-top: 16px;'>
+    <summary style='background-color: #f8f9fa; padding: 12px 16px; font-weight: 600; cursor: pointer; list-style: none; font-size: 15px;'>
+    📊 오버나잇 계산기
+    </summary>
+    <div style='padding: 16px; font-size: 0.9rem; line-height: 1.8; color: #666;'>
+    데이터가 부족합니다. 최소 2일의 데이터가 필요합니다.
+    </div>
+    </details>
+    """
+
+        st.markdown(info_details, unsafe_allow_html=True)
+
+def render_kosdaq_section(kosdaq):
+    # ==========================================================================
+    # 코스닥150 레버리지 전략 섹션 (UI 출력 부분)
+    # ==========================================================================
+    st.write("")
+
+    if kosdaq is None:
+        kosdaq_error_html = """<details style='background-color: white; border: 1px solid #e0e0e0; border-radius: 8px; padding: 0; margin-top: 16px;'><summary style='background-color: #f8f9fa; padding: 12px 16px; font-weight: 600; cursor: pointer; list-style: none; font-size: 15px;'>📈 코스닥 레버리지</summary><div style='padding: 16px; font-size: 0.9rem; color: #666;'>데이터가 부족합니다.</div></details>"""
+        st.markdown(kosdaq_error_html, unsafe_allow_html=True)
+        return
+
+    is_before_market_open = kosdaq["is_before_market_open"]
+    current_position = kosdaq["current_position"]
+    prev_position = kosdaq["prev_position"]
+    today_action = kosdaq["today_action"]
+    today_open = kosdaq["today_open"]
+    prev_high = kosdaq["prev_high"]
+    prev_low = kosdaq["prev_low"]
+    prev_kosdaq_disparity = kosdaq["prev_kosdaq_disparity"]
+    prev_leverage_disparity = kosdaq["prev_leverage_disparity"]
+    K_B = kosdaq["K_B"]
+    K_S = kosdaq["K_S"]
+    kb_met = kosdaq["kb_met"]
+    ks_met = kosdaq["ks_met"]
+    disparity_met = kosdaq["disparity_met"]
+
+    disparity_status = "✓ 충족" if disparity_met else "✗ 미충족"
+    kb_status = "✓ 충족" if kb_met else "✗ 미충족" if not is_before_market_open else "⏳ 대기"
+    ks_status = "✓ 충족" if ks_met else "✗ 미충족" if not is_before_market_open else "⏳ 대기"
+
     position_color = "#5BA17B" if current_position == "보유" else "#9E9E9E"
-    
+
     # HTML 생성 시작
     kosdaq_html = f"""<details style='background-color: white; border: 1px solid #e0e0e0; border-radius: 8px; padding: 0; margin-top: 16px;'>
     <summary style='background-color: #f8f9fa; padding: 12px 16px; font-weight: 600; cursor: pointer; list-style: none; font-size: 15px;'>
@@ -708,7 +742,7 @@ if not df_kosdaq.empty and len(df_kosdaq) >= 2:
         <hr style='border: none; border-top: 1px solid #ffffff50; margin: 10px 0;'>
         <div style='font-size: 14px;'>오늘 액션: <strong>{today_action}</strong></div>
     </div>"""
-    
+
     if prev_position == "현금":
         border_color = "#5BA17B" if kb_met else "#9E9E9E"
         kosdaq_html += f"""<div style='background-color: #f8f9fa; border-radius: 10px; padding: 16px; margin-bottom: 12px; border-left: 4px solid {border_color};'>
@@ -718,8 +752,8 @@ if not df_kosdaq.empty and len(df_kosdaq) >= 2:
             </div>
             <div style='font-size: 12px; color: #868e96; line-height: 1.6;'>
                 {'예상 시가' if is_before_market_open else '당일 시가'}: {today_open:,.0f}원<br>
-                조건1 (전일): {range_multiplier_buy:,.0f}원<br>
-                조건2 (10일): {max_close_open_10:,.0f}원<br>
+                조건1 (전일): {kosdaq["range_multiplier_buy"]:,.0f}원<br>
+                조건2 (10일): {kosdaq["max_close_open_10"]:,.0f}원<br>
             </div>
             <div style='margin-top: 12px; padding-top: 12px; border-top: 1px solid #dee2e6;'>
                 <span style='font-size: 13px; font-weight: 600;'>{kb_status}</span>
@@ -744,7 +778,7 @@ if not df_kosdaq.empty and len(df_kosdaq) >= 2:
                 </div>
                 <div style='font-size: 12px; color: #868e96; line-height: 1.6; margin-bottom: 10px;'>
                     {'예상 시가' if is_before_market_open else '당일 시가'}: {today_open:,.0f}원<br>
-                    전일 범위 ({prev_high:,.0f} - {prev_low:,.0f}) × 0.3 = {range_multiplier_sell:,.0f}원<br>
+                    전일 범위 ({prev_high:,.0f} - {prev_low:,.0f}) × 0.3 = {kosdaq["range_multiplier_sell"]:,.0f}원<br>
                 </div>
                 <div style='font-size: 12px; color: #adb5bd; line-height: 1.5;'>
                     코스피 {prev_leverage_disparity:.2f} / 코스닥 {prev_kosdaq_disparity:.2f}
@@ -760,11 +794,59 @@ if not df_kosdaq.empty and len(df_kosdaq) >= 2:
                     </div>
                 </div>
             </div>"""
-    
+
     kosdaq_html += """</div></details>"""
-    
+
     st.markdown(kosdaq_html, unsafe_allow_html=True)
-    
-else:
-    kosdaq_error_html = """<details style='background-color: white; border: 1px solid #e0e0e0; border-radius: 8px; padding: 0; margin-top: 16px;'><summary style='background-color: #f8f9fa; padding: 12px 16px; font-weight: 600; cursor: pointer; list-style: none; font-size: 15px;'>📈 코스닥 레버리지</summary><div style='padding: 16px; font-size: 0.9rem; color: #666;'>데이터가 부족합니다.</div></details>"""
-    st.markdown(kosdaq_error_html, unsafe_allow_html=True)
\ No newline at end of file
+
+def render_dashboard():
+    # 4-1. 전역 폰트 설정을 위한 CSS 주입
+    st.markdown("""
+<style>
+    html, body, [class*="st-"] {
+        font-family: 'Noto Sans KR', sans-serif !important;
+    }
+</style>
+""", unsafe_allow_html=True)
+
+    # 스냅샷이 있으면 읽기만 하고, 없을 때(최초 실행 등)만 직접 계산
+    snapshot = load_snapshot()
+    is_live = snapshot is None
+    if is_live:
+        snapshot = get_shared_state().get_snapshot()
+        if snapshot is None:
+            st.error("❌ 데이터가 부족하거나 불러오지 못했습니다. 날짜 범위를 확인해 주세요.")
+            st.stop()
+
+    render_snapshot_status(snapshot, is_live)
+    render_header_card(snapshot["header"])
+    render_strategy_list(snapshot["strategy_rows"])
+    render_overnight_calculator(snapshot["overnight_calculator"])
+    render_kosdaq_section(snapshot["kosdaq"])
+
+# ==============================================================================
+# 메인 애플리케이션 로직 시작
+# streamlit run "LV Strategy_KQ.py"             : 대시보드 렌더링
+# python "LV Strategy_KQ.py" --write-snapshot   : 스냅샷 생성 및 신호 이력 기록 (cron 등 주기 실행)
+# python "LV Strategy_KQ.py" --write-snapshot --loop
+#                                               : 프로세스를 유지하며 5분마다 갱신 (지표는 바뀐 봉 이후만 재계산)
+# ==============================================================================
+if __name__ == "__main__":
+    if "--write-snapshot" in sys.argv:
+        store = SignalStore(SIGNAL_STORE_PATH)
+        try:
+            if "--loop" in sys.argv:
+                frames = {}  # 갱신 간에 지표 캐시 유지
+                while True:
+                    try:
+                        if not refresh_snapshot(store, frames):
+                            print("데이터가 부족하거나 불러오지 못했습니다.", file=sys.stderr)
+                    except Exception as e:  # 일시적인 조회 실패는 다음 주기에 다시 시도
+                        print(f"스냅샷 갱신 실패: {e!r}", file=sys.stderr)
+                    time.sleep(SNAPSHOT_REFRESH_SECONDS)
+            elif not refresh_snapshot(store):
+                sys.exit("데이터가 부족하거나 불러오지 못했습니다.")
+        finally:
+            store.close()
+    else:
+        render_dashboard()
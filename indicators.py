@@ -0,0 +1,185 @@
+"""
+지표 레지스트리 (지연 계산 + 의존성 추적)
+
+파생 컬럼마다 입력 컬럼과 lookback(계산에 필요한 과거 행 수)을 선언해 등록합니다.
+IndicatorFrame은 컬럼에 처음 접근할 때 필요한 입력부터 계산해 캐시하고,
+새 봉이 추가되거나 기존 봉이 수정되면(update) 처음 달라진 행 이후만,
+파라미터가 바뀌면(set_params) 해당 지표와 그 지표에 의존하는 지표만 다시 계산합니다.
+
+    frame = IndicatorFrame(bars)
+    frame["Disparity"]       # Close_MA20 -> Disparity 순으로 계산
+    frame.update(new_bars)   # 마지막 봉이 바뀌었으면 마지막 구간만 재계산
+"""
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from strategy_rules import RuleSet, kosdaq_threshold_rules, leverage_decision_rules
+
+
+class Indicator:
+    def __init__(self, name, inputs, lookback, compute, defaults, ffill=False):
+        self.name = name
+        self.inputs = inputs
+        self.lookback = lookback  # 정수 또는 파라미터를 받아 정수를 반환하는 함수
+        self.compute = compute
+        self.defaults = defaults
+        self.ffill = ffill  # 결측값을 이전 값으로 채움 (캐시된 앞부분과 이어 붙인 뒤 적용)
+
+    def lookback_for(self, params):
+        return self.lookback(**params) if callable(self.lookback) else self.lookback
+
+
+REGISTRY = {}
+
+def indicator(name, inputs, lookback=0, ffill=False, **defaults):
+    """
+    지표 계산 함수를 레지스트리에 등록합니다.
+    계산 함수는 (입력 컬럼 DataFrame, **파라미터)를 받아 같은 길이의 배열/Series를 반환하며,
+    행 i의 값은 i - lookback ~ i 행의 입력에만 의존해야 합니다.
+    ffill처럼 lookback 밖의 값에 의존하는 후처리는 계산 함수 대신 플래그로 지정합니다.
+    """
+    def decorator(compute):
+        REGISTRY[name] = Indicator(name, inputs, lookback, compute, defaults, ffill)
+        return compute
+    return decorator
+
+
+def _rolling_mean(values, window):
+    # 창마다 독립적으로 평균을 계산하므로 일부 구간만 다시 계산해도 전체 계산과 같은 값이 나옴
+    out = np.full(len(values), np.nan)
+    if len(values) >= window:
+        out[window - 1:] = sliding_window_view(values.astype(float), window).mean(axis=1)
+    return out
+
+# ==============================================================================
+# 지표 정의
+# ==============================================================================
+@indicator("Volume_MA3", inputs=["Volume"], lookback=lambda window: window - 1, ffill=True, window=3)
+def volume_ma(df, window):
+    # 3일 이동평균 거래량
+    return _rolling_mean(df["Volume"].to_numpy(), window)
+
+@indicator("Close_MA20", inputs=["Close"], lookback=lambda window: window - 1, ffill=True, window=20)
+def close_ma(df, window):
+    # 20일 이동평균 종가
+    return _rolling_mean(df["Close"].to_numpy(), window)
+
+@indicator("Disparity", inputs=["Close", "Close_MA20"])
+def disparity(df):
+    # 이격도: (현재 종가 / 20일 이동평균 종가) * 100
+    return (df["Close"] / df["Close_MA20"]) * 100
+
+@indicator("판단", inputs=["Volume", "Volume_MA3", "Low", "Disparity"], lookback=1,
+           disparity_low=98, disparity_high=106, inverse_disparity=101, inverse_change=0.5)
+def leverage_decision(df, **params):
+    # 기본 전략 판단 (레버리지, 인버스, 현금보유) - 오버나잇은 strategy_rules.LEVERAGE_SIGNAL_RULES
+    return RuleSet(*leverage_decision_rules(**params)).run(df)["판단"]
+
+@indicator("K_B", inputs=["Open", "High", "Low", "Close"], lookback=lambda max_close_open_days, **_: max_close_open_days,
+           buy_range=0.4, max_close_open_days=10)
+def kosdaq_buy_threshold(df, buy_range, max_close_open_days):
+    # K(B) = ceil(당일 시가 + min(전일 범위 × 0.4, 직전 10일 max(close - open)))
+    return RuleSet(*kosdaq_threshold_rules(buy_range=buy_range, max_close_open_days=max_close_open_days)).run(df)["K_B"]
+
+@indicator("K_S", inputs=["Open", "High", "Low"], lookback=1, sell_range=0.3)
+def kosdaq_sell_threshold(df, sell_range):
+    # K(S) = floor(당일 시가 - 전일 범위 × 0.3)
+    steps = [step for step in kosdaq_threshold_rules(sell_range=sell_range) if step.output == "K_S"]
+    return RuleSet(*steps).run(df)["K_S"]
+
+# ==============================================================================
+# 지연 계산 프레임
+# ==============================================================================
+class IndicatorFrame:
+    """
+    OHLCV 봉 DataFrame과 파생 컬럼 캐시. frame[name]으로 원본/파생 컬럼을 Series로 얻습니다.
+    캐시는 "앞에서부터 유효한 행 수"로 관리되며, 무효화된 뒤쪽 구간만 lookback만큼 앞에서부터 다시 계산합니다.
+    """
+    def __init__(self, bars, params=None, registry=REGISTRY):
+        self.bars = bars
+        self.registry = registry
+        self.params = {name: dict(spec.defaults) for name, spec in registry.items()}
+        for name, values in (params or {}).items():
+            self.params[name].update(values)
+        self._cache = {}  # 지표명 -> 유효한 앞부분 Series
+        self._order = _topological_order(registry)
+
+    def __getitem__(self, name):
+        if name in self.bars.columns:
+            return self.bars[name]
+
+        spec = self.registry[name]
+        n = len(self.bars)
+        cached = self._cache.get(name)
+        valid = len(cached) if cached is not None else 0
+        if valid == n:
+            return cached
+
+        params = self.params[name]
+        start = max(0, valid - spec.lookback_for(params))
+        inputs = pd.DataFrame({column: self[column].iloc[start:] for column in spec.inputs})
+        tail = pd.Series(spec.compute(inputs, **params), index=inputs.index).iloc[valid - start:]
+        result = pd.concat([cached, tail]) if valid else tail
+        if spec.ffill:
+            # 다시 계산한 구간의 결측값은 캐시된 앞부분의 마지막 값으로 채워야 전체 계산과 같음
+            result = result.ffill()
+        self._cache[name] = result
+        return result
+
+    def columns(self, *names):
+        """원본 봉에 요청한 파생 컬럼을 붙인 DataFrame을 반환합니다."""
+        df = self.bars.copy()
+        for name in names:
+            df[name] = self[name]
+        return df
+
+    def update(self, bars):
+        """
+        새로 받은 봉으로 교체합니다. 처음 달라진 행(새 봉 추가, 수정된 봉) 이후의 캐시만 무효화하며,
+        앞쪽이 바뀌면(조회 시작일 이동 등) 전체를 다시 계산합니다.
+        """
+        first_changed = _first_changed_row(self.bars, bars)
+        self.bars = bars
+        self._invalidate({column: first_changed for column in bars.columns})
+
+    def set_params(self, name, **params):
+        """지표 파라미터를 바꾸고, 그 지표와 의존하는 지표의 캐시를 무효화합니다."""
+        self.params[name].update(params)
+        self._invalidate({name: 0})
+
+    def _invalidate(self, dirty):
+        # dirty: 컬럼명 -> 이 행부터 값이 바뀜. 의존 순서대로 전파
+        dirty = dict(dirty)
+        for name in self._order:
+            rows = [dirty[column] for column in self.registry[name].inputs if column in dirty]
+            if name in dirty:
+                rows.append(dirty[name])
+            if not rows:
+                continue
+            dirty[name] = min(rows)
+            if name in self._cache:
+                self._cache[name] = self._cache[name].iloc[:dirty[name]]
+
+
+def _topological_order(registry):
+    order = []
+    def visit(name):
+        if name in order or name not in registry:
+            return
+        for column in registry[name].inputs:
+            visit(column)
+        order.append(name)
+    for name in registry:
+        visit(name)
+    return order
+
+def _first_changed_row(old, new):
+    if list(old.columns) != list(new.columns):
+        return 0
+    m = min(len(old), len(new))
+    a = old.iloc[:m].to_numpy()
+    b = new.iloc[:m].to_numpy()
+    same = (old.index[:m] == new.index[:m]) & ((a == b) | (pd.isna(a) & pd.isna(b))).all(axis=1)
+    changed = np.flatnonzero(~same)
+    return int(changed[0]) if len(changed) else m
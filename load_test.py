@@ -0,0 +1,84 @@
+"""
+동시 세션 부하 테스트
+
+로컬 가짜 데이터 소스(네트워크 지연을 sleep으로 흉내)를 사용해 N개의 Streamlit 세션이
+동시에 대시보드를 요청하는 상황을 시뮬레이션하고, 세션마다 직접 계산하는 방식과
+SharedState(single-flight)로 공유하는 방식의 처리량을 비교합니다.
+
+    python load_test.py --sessions 100 --latency 0.3
+"""
+import argparse
+import importlib.util
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+# 파일명에 공백이 있어 일반 import 대신 경로로 로드 (__name__이 "__main__"이 아니므로 UI는 실행되지 않음)
+_spec = importlib.util.spec_from_file_location(
+    "lv_strategy_kq",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "LV Strategy_KQ.py"),
+)
+lv = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(lv)
+
+
+class FakeDataSource:
+    """티커별로 고정된 난수 시드의 OHLCV를 돌려주는 가짜 데이터 소스. 호출 횟수를 기록합니다."""
+    def __init__(self, latency):
+        self.latency = latency
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, ticker, start_date, end_date):
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.latency)  # 데이터 소스 응답 지연
+
+        rng = np.random.default_rng(int(ticker))
+        index = pd.bdate_range(pd.Timestamp(start_date).normalize(), pd.Timestamp(end_date).normalize())
+        close = 10000 + np.cumsum(rng.normal(0, 150, len(index)))
+        open_ = close + rng.normal(0, 80, len(index))
+        return pd.DataFrame({
+            "Open": open_.round(),
+            "High": (np.maximum(open_, close) + rng.uniform(0, 150, len(index))).round(),
+            "Low": (np.minimum(open_, close) - rng.uniform(0, 150, len(index))).round(),
+            "Close": close.round(),
+            "Volume": rng.integers(100_000, 1_000_000, len(index)),
+        }, index=index)
+
+
+def simulate_session(get_snapshot):
+    # 한 세션의 페이지 로드: 스냅샷 확보 후 전략리스트 HTML 생성
+    snapshot = get_snapshot()
+    lv.create_strategy_list_html(snapshot["strategy_rows"])
+
+
+def run(label, sessions, get_snapshot, source):
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=sessions) as pool:
+        for future in [pool.submit(simulate_session, get_snapshot) for _ in range(sessions)]:
+            future.result()
+    elapsed = time.perf_counter() - started
+    print(f"{label:<12} 세션 {sessions}개  {elapsed:6.2f}초  {sessions / elapsed:8.1f} 세션/초  데이터 조회 {source.calls}회")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SharedState 동시 세션 부하 테스트")
+    parser.add_argument("--sessions", type=int, default=100, help="동시 세션 수")
+    parser.add_argument("--latency", type=float, default=0.3, help="가짜 데이터 소스 응답 지연(초)")
+    args = parser.parse_args()
+
+    source = FakeDataSource(args.latency)
+    run("세션별 계산", args.sessions, lambda: lv.build_snapshot(source), source)
+
+    source = FakeDataSource(args.latency)
+    state = lv.SharedState(fetch=source)
+    run("SharedState", args.sessions, state.get_snapshot, source)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+"""
+전략 신호 이력 저장소 (append-only SQLite)
+
+계산된 신호(판단, 포지션 등)를 계산에 쓰인 입력 봉 구간의 해시와 계산 시각과 함께 기록합니다.
+데이터 소스가 과거 봉을 수정해 신호가 바뀌어도 이전 기록은 남으므로
+"X일 10:00에 대시보드가 무엇을 표시했는가"를 조회할 수 있습니다.
+
+    store = SignalStore("signal_history.sqlite")
+    store.record(signal_records(recent.tail(1), "122630", "leverage", "판단", ["매수액션", "매도액션"], bars=df_leverage))
+    store.signal_at("122630", datetime(2026, 10, 19, 10, 0))   # 헤더 카드에 표시된 값
+"""
+import hashlib
+import json
+import sqlite3
+from datetime import datetime, timezone
+
+import pandas as pd
+import pytz
+
+KST = pytz.timezone('Asia/Seoul')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS signals (
+    id          INTEGER PRIMARY KEY,
+    ticker      TEXT NOT NULL,
+    strategy    TEXT NOT NULL,
+    bar_date    TEXT NOT NULL,  -- YYYY-MM-DD
+    computed_at TEXT NOT NULL,  -- UTC ISO 8601 (마이크로초 포함, 문자열 비교로 정렬 가능)
+    signal      TEXT,
+    bar_hash    TEXT NOT NULL,  -- 해당 날짜까지 계산에 쓰인 OHLCV 봉 구간의 해시 (봉 수정 감지용)
+    details     TEXT            -- 부가 값 JSON (매수/매도 액션, K_B/K_S 등)
+);
+-- 시점 조회 (ticker, strategy, bar_date별 최신 기록) 및 bar_date 범위 조회
+CREATE INDEX IF NOT EXISTS idx_signals_point_in_time ON signals (ticker, strategy, bar_date, computed_at);
+-- 계산 시각 범위 조회 및 (ticker, strategy)별 마지막 기록 조회
+CREATE INDEX IF NOT EXISTS idx_signals_computed_at ON signals (computed_at);
+CREATE INDEX IF NOT EXISTS idx_signals_series ON signals (ticker, strategy, computed_at);
+-- append-only: 기록 수정/삭제 금지
+CREATE TRIGGER IF NOT EXISTS signals_no_update BEFORE UPDATE ON signals
+BEGIN SELECT RAISE(ABORT, 'signals is append-only'); END;
+CREATE TRIGGER IF NOT EXISTS signals_no_delete BEFORE DELETE ON signals
+BEGIN SELECT RAISE(ABORT, 'signals is append-only'); END;
+"""
+
+# 같은 (ticker, strategy)의 마지막 기록과 날짜/신호/봉/부가 값이 모두 같으면 다시 기록하지 않음
+# (값이 바뀔 때마다 기록되므로 계산 시각 기준으로 당시 표시된 값을 조회할 수 있음)
+_INSERT = """
+INSERT INTO signals (ticker, strategy, bar_date, computed_at, signal, bar_hash, details)
+SELECT :ticker, :strategy, :bar_date, :computed_at, :signal, :bar_hash, :details
+WHERE NOT EXISTS (
+    SELECT 1 FROM (
+        SELECT bar_date, signal, bar_hash, details FROM signals
+        WHERE ticker = :ticker AND strategy = :strategy
+        ORDER BY computed_at DESC LIMIT 1
+    ) AS latest
+    WHERE latest.bar_date = :bar_date AND latest.signal IS :signal
+      AND latest.bar_hash = :bar_hash AND latest.details IS :details
+)
+"""
+
+_COLUMNS = ("ticker", "strategy", "bar_date", "computed_at", "signal", "bar_hash", "details")
+
+OHLCV_COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+
+HEADER_STRATEGY = "leverage_header"  # 대시보드 헤더 카드에 표시된 최종 값
+
+
+def to_utc_iso(at):
+    """datetime을 저장 형식(UTC ISO)으로 변환합니다. timezone이 없으면 KST로 간주합니다."""
+    if at.tzinfo is None:
+        at = KST.localize(at)
+    return at.astimezone(timezone.utc).isoformat(timespec="microseconds")
+
+
+def bar_window_hash(bars, end_date, lookback=None):
+    """
+    end_date(포함)까지 최근 lookback + 1개 봉(lookback이 None이면 처음부터)의 OHLCV 해시.
+    신호가 의존하는 구간 전체를 해시하므로 이전 봉이 수정되어도 달라집니다.
+    """
+    window = bars.loc[:end_date, OHLCV_COLUMNS]
+    if lookback is not None:
+        window = window.tail(lookback + 1)
+    row_hashes = pd.util.hash_pandas_object(window, index=True).to_numpy()
+    return hashlib.sha256(row_hashes.tobytes()).hexdigest()[:16]
+
+
+def make_record(ticker, strategy, bar_date, signal, bar_hash, details=None, computed_at=None):
+    """SignalStore.record()에 넘길 기록 하나를 만듭니다."""
+    return {
+        "ticker": ticker,
+        "strategy": strategy,
+        "bar_date": pd.Timestamp(bar_date).strftime("%Y-%m-%d"),
+        "computed_at": to_utc_iso(computed_at or datetime.now(timezone.utc)),
+        "signal": str(signal),
+        "bar_hash": bar_hash,
+        "details": json.dumps(details, ensure_ascii=False, sort_keys=True) if details else None,
+    }
+
+
+def signal_records(df, ticker, strategy, signal_column, detail_columns=(), computed_at=None, bars=None, lookback=None):
+    """
+    전략 결과 DataFrame(인덱스: 날짜)을 SignalStore.record()에 넘길 dict 리스트로 변환합니다.
+    신호가 없는 행(계산에 필요한 과거 데이터가 없는 앞쪽 행)은 제외합니다.
+    bars는 계산에 쓰인 원본 봉(기본: df)이며, 행마다 그 날짜까지의 lookback 구간을 해시합니다.
+    확정된 값만 기록하도록 보통 마지막 행(df.tail(1))만 넘깁니다.
+    """
+    bars = df if bars is None else bars
+    records = []
+    for bar_date, row in df.iterrows():
+        signal = row[signal_column]
+        if signal is None or pd.isna(signal):
+            continue
+        details = {name: _to_json_value(row[name]) for name in detail_columns}
+        records.append(make_record(ticker, strategy, bar_date, signal, bar_window_hash(bars, bar_date, lookback),
+                                   details, computed_at))
+    return records
+
+
+def _to_json_value(value):
+    if hasattr(value, "item"):  # NumPy 스칼라
+        value = value.item()
+    if isinstance(value, float) and value != value:  # NaN
+        return None
+    return value
+
+
+class SignalStore:
+    """append-only 신호 이력 저장소. 조회 결과는 컬럼명을 키로 하는 dict입니다."""
+    def __init__(self, path):
+        self.conn = sqlite3.connect(path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")    # 기록 중에도 조회 가능
+        self.conn.execute("PRAGMA synchronous=NORMAL")  # WAL에서 안전한 범위 내 빠른 커밋
+        self.conn.executescript(_SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def record(self, records):
+        """여러 종목의 기록을 한 트랜잭션으로 추가합니다. 실제로 추가된 행 수를 반환합니다."""
+        before = self.conn.total_changes
+        with self.conn:
+            self.conn.executemany(_INSERT, records)
+        return self.conn.total_changes - before
+
+    def signal_at(self, ticker, at, strategy=HEADER_STRATEGY):
+        """
+        at 시각까지 마지막으로 기록된 값. 기본값은 헤더 카드 기록이므로 그 시각에 대시보드가 보여준 값입니다
+        (bar_date는 헤더 판단의 날짜: 보통 최근일, 전일이 오버나잇이면 전일).
+        """
+        row = self.conn.execute(
+            f"SELECT {', '.join(_COLUMNS)} FROM signals"
+            " WHERE ticker = ? AND strategy = ? AND computed_at <= ?"
+            " ORDER BY computed_at DESC LIMIT 1",
+            (ticker, strategy, to_utc_iso(at)),
+        ).fetchone()
+        return _to_dict(row)
+
+    def history(self, ticker, strategy, start_date, end_date, as_of=None):
+        """
+        bar_date가 start_date~end_date(YYYY-MM-DD, 양끝 포함)인 날짜별 신호.
+        as_of를 주면 그 시각까지 기록된 값 중 최신 값을 반환합니다 (기본: 현재 최신 값).
+        """
+        as_of = to_utc_iso(as_of) if as_of is not None else "9999"
+        rows = self.conn.execute(
+            f"SELECT {', '.join(_COLUMNS)} FROM ("
+            f" SELECT {', '.join(_COLUMNS)}, ROW_NUMBER() OVER (PARTITION BY bar_date ORDER BY computed_at DESC) AS rn"
+            " FROM signals WHERE ticker = ? AND strategy = ? AND bar_date BETWEEN ? AND ? AND computed_at <= ?"
+            ") WHERE rn = 1 ORDER BY bar_date",
+            (ticker, strategy, start_date, end_date, as_of),
+        ).fetchall()
+        return [_to_dict(row) for row in rows]
+
+    def revisions(self, ticker, strategy, bar_date):
+        """한 날짜에 대해 기록된 모든 값 (봉 수정 등으로 신호가 바뀐 이력)."""
+        rows = self.conn.execute(
+            f"SELECT {', '.join(_COLUMNS)} FROM signals"
+            " WHERE ticker = ? AND strategy = ? AND bar_date = ? ORDER BY computed_at",
+            (ticker, strategy, bar_date),
+        ).fetchall()
+        return [_to_dict(row) for row in rows]
+
+
+def _to_dict(row):
+    if row is None:
+        return None
+    result = dict(row)
+    result["details"] = json.loads(result["details"]) if result["details"] else {}
+    return result
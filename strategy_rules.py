@@ -0,0 +1,394 @@
+"""
+전략 규칙 DSL
+
+시프트된 컬럼에 대한 조건, 임계값, 상태 전이를 선언적으로 정의하고
+NumPy 배열 연산(커널)으로 실행합니다. 대시보드, 백테스트, 파라미터 스윕이 같은 규칙 정의를
+공유하므로 새 규칙 변형은 규칙 빌더 함수의 인자나 단계 목록만 바꿔서 시험할 수 있습니다.
+
+    rules = RuleSet(*leverage_decision_rules(disparity_high=108))
+    result = rules.apply(df)   # df에 "판단" 컬럼이 추가된 복사본
+"""
+import operator
+
+import numpy as np
+import pandas as pd
+
+# ==============================================================================
+# 표현식 (컬럼 조건식)
+# 표현식은 생성 시점에 배열 함수로 조립되며, 실행 시에는 컬럼 배열 전체에 한 번에 적용됩니다.
+# ==============================================================================
+class Expr:
+    """
+    컬럼 배열에 대한 표현식. 연산자(+, -, *, <, ==, &, | 등)로 조합합니다.
+    lookback/lookahead는 값이 정의되기 위해 필요한 과거/미래 행 수입니다 (shift(1)이면 lookback 1,
+    shift(-1)이면 lookahead 1). 규칙 단계는 이 범위 밖의 행에서 조건을 미충족으로 취급합니다.
+    """
+    def __init__(self, kernel, lookback=0, desc="", lookahead=0):
+        self.kernel = kernel  # (columns) -> ndarray 또는 스칼라
+        self.lookback = lookback
+        self.desc = desc
+        self.lookahead = lookahead
+
+    def __repr__(self):
+        return self.desc
+
+    def __bool__(self):
+        raise TypeError("규칙 표현식은 and/or/not 또는 연쇄 비교(a <= b <= c)를 지원하지 않습니다. &, |, ~, between()을 사용하세요.")
+
+    def evaluate(self, columns):
+        return np.broadcast_to(self.kernel(columns), (columns.length,))
+
+    def shift(self, periods=1):
+        kernel = self.kernel
+        return Expr(lambda c: _shift(np.broadcast_to(kernel(c), (c.length,)), periods),
+                    self.lookback + max(periods, 0), f"{self.desc}.shift({periods})",
+                    self.lookahead + max(-periods, 0))
+
+    def _binary(self, other, op, symbol, reflected=False):
+        other = _as_expr(other)
+        left, right = (other, self) if reflected else (self, other)
+        a, b = left.kernel, right.kernel
+        return Expr(lambda c: op(a(c), b(c)), max(left.lookback, right.lookback),
+                    f"({left.desc} {symbol} {right.desc})", max(left.lookahead, right.lookahead))
+
+    def __add__(self, other): return self._binary(other, operator.add, "+")
+    def __radd__(self, other): return self._binary(other, operator.add, "+", reflected=True)
+    def __sub__(self, other): return self._binary(other, operator.sub, "-")
+    def __rsub__(self, other): return self._binary(other, operator.sub, "-", reflected=True)
+    def __mul__(self, other): return self._binary(other, operator.mul, "*")
+    def __rmul__(self, other): return self._binary(other, operator.mul, "*", reflected=True)
+    def __lt__(self, other): return self._binary(other, operator.lt, "<")
+    def __le__(self, other): return self._binary(other, operator.le, "<=")
+    def __gt__(self, other): return self._binary(other, operator.gt, ">")
+    def __ge__(self, other): return self._binary(other, operator.ge, ">=")
+    def __eq__(self, other): return self._binary(other, operator.eq, "==")
+    def __ne__(self, other): return self._binary(other, operator.ne, "!=")
+    def __and__(self, other): return self._binary(other, operator.and_, "&")
+    def __or__(self, other): return self._binary(other, operator.or_, "|")
+
+    def __invert__(self):
+        kernel = self.kernel
+        return Expr(lambda c: ~kernel(c), self.lookback, f"~{self.desc}", self.lookahead)
+
+    def __abs__(self):
+        kernel = self.kernel
+        return Expr(lambda c: np.abs(kernel(c)), self.lookback, f"abs({self.desc})", self.lookahead)
+
+    __hash__ = None
+
+
+def _as_expr(value):
+    if isinstance(value, Expr):
+        return value
+    return Expr(lambda c: value, 0, repr(value))
+
+def _shift(values, periods):
+    # 조건(bool)은 False, 숫자형은 NaN, 그 외(판단 등 문자열)는 None으로 채움 (bool끼리 &, ~ 연산이 유지되도록)
+    if values.dtype.kind == "b":
+        out = np.zeros(len(values), dtype=bool)
+    elif values.dtype.kind in "iuf":
+        values = values.astype(float)
+        out = np.full(len(values), np.nan)
+    else:
+        out = np.full(len(values), None, dtype=object)
+    if periods > 0:
+        out[periods:] = values[:-periods]
+    elif periods < 0:
+        out[:periods] = values[-periods:]
+    else:
+        out[:] = values
+    return out
+
+def _condition(cond, columns):
+    # 조건을 행 선택 마스크로 평가. 시프트로 값이 없는 앞/뒤 행과 NaN/None은 미충족으로 취급
+    values = cond.evaluate(columns)
+    if values.dtype.kind == "b":
+        mask = values.copy()
+    else:
+        mask = pd.notna(values) & (pd.Series(values).fillna(0).to_numpy() != 0)
+    mask[:cond.lookback] = False
+    mask[max(columns.length - cond.lookahead, 0):] = False
+    return mask
+
+def _apply(func, name, *exprs):
+    exprs = [_as_expr(e) for e in exprs]
+    kernels = [e.kernel for e in exprs]
+    return Expr(lambda c: func(*(k(c) for k in kernels)), max(e.lookback for e in exprs),
+                f"{name}({', '.join(e.desc for e in exprs)})", max(e.lookahead for e in exprs))
+
+def col(name):
+    """DataFrame 컬럼(또는 앞 단계에서 만든 컬럼)을 참조합니다."""
+    return Expr(lambda c: c[name], 0, name)
+
+def maximum(a, b):
+    return _apply(np.maximum, "max", a, b)
+
+def minimum(a, b):
+    return _apply(np.minimum, "min", a, b)
+
+def ceil(a):
+    return _apply(np.ceil, "ceil", a)
+
+def floor(a):
+    return _apply(np.floor, "floor", a)
+
+def between(value, low, high):
+    """low <= value <= high"""
+    return (_as_expr(low) <= value) & (_as_expr(value) <= high)
+
+def rolling_max(a, window):
+    """현재 행을 포함한 최근 window개 행의 최대값 (초기 구간은 있는 만큼만 사용)."""
+    a = _as_expr(a)
+    kernel = a.kernel
+    return Expr(lambda c: pd.Series(np.broadcast_to(kernel(c), (c.length,))).rolling(window, min_periods=1).max().to_numpy(),
+                a.lookback, f"rolling_max({a.desc}, {window})", a.lookahead)
+
+# ==============================================================================
+# 규칙 단계
+# 각 단계는 컬럼 하나(또는 여러 개)를 만들거나 갱신하며, RuleSet 안에서 순서대로 실행됩니다.
+# ==============================================================================
+class Column:
+    """표현식 결과를 새 컬럼으로 저장합니다."""
+    def __init__(self, output, expr):
+        self.output = output
+        self.expr = expr
+
+    def run(self, columns):
+        columns[self.output] = self.expr.evaluate(columns)
+
+
+class Classify:
+    """
+    (조건, 값) 목록 중 처음 충족되는 조건의 값을 선택합니다. 모두 미충족이면 default.
+    조건에 필요한 과거 데이터가 없는 앞쪽 행은 None입니다.
+    """
+    def __init__(self, output, cases, default):
+        self.output = output
+        self.cases = cases
+        self.default = default
+        self.lookback = max((cond.lookback for cond, _ in cases), default=0)
+
+    def run(self, columns):
+        out = np.full(columns.length, self.default, dtype=object)
+        for cond, value in reversed(self.cases):  # 앞쪽 조건이 우선하도록 역순으로 덮어씀
+            out[_condition(cond, columns)] = value
+        out[:self.lookback] = None
+        columns[self.output] = out
+
+
+class Override:
+    """조건이 충족되는 행의 기존 컬럼 값을 value로 바꿉니다."""
+    def __init__(self, output, when, value):
+        self.output = output
+        self.when = when
+        self.value = value
+
+    def run(self, columns):
+        out = np.array(columns[self.output], dtype=object)
+        out[_condition(self.when, columns)] = self.value
+        columns[self.output] = out
+
+
+class Transition:
+    """
+    (전일 상태, 당일 상태) 조합을 출력 값 튜플로 매핑합니다 (예: 포지션 변화 -> 매수/매도 액션).
+    aliases로 여러 상태를 하나로 취급할 수 있습니다 (예: 오버나잇 -> 레버리지).
+    """
+    def __init__(self, outputs, state, table, default, aliases=None):
+        self.outputs = outputs
+        self.state = state
+        self.table = table
+        self.default = default
+        self.aliases = aliases or {}
+
+    def run(self, columns):
+        state = np.array(columns[self.state], dtype=object)
+        effective = state.copy()
+        for name, alias in self.aliases.items():
+            effective[state == name] = alias
+        prev_effective = _shift(effective, 1)
+
+        outs = [np.full(columns.length, value, dtype=object) for value in self.default]
+        for (prev_state, today_state), values in self.table.items():
+            mask = (prev_effective == prev_state) & (effective == today_state)
+            for out, value in zip(outs, values):
+                out[mask] = value
+        for output, out in zip(self.outputs, outs):
+            columns[output] = out
+
+
+class StateMachine:
+    """
+    [(현재 상태, 조건, 다음 상태)] 전이 규칙으로 행마다 상태를 갱신합니다. 첫 행은 initial.
+    조건은 배열 연산으로 한 번에 계산하고, 상태 점화식만 정수 코드로 순차 진행합니다.
+    """
+    def __init__(self, output, initial, transitions):
+        self.output = output
+        self.initial = initial
+        self.transitions = transitions
+
+    def run(self, columns):
+        states = [self.initial] + [s for frm, _, to in self.transitions for s in (frm, to) if s != self.initial]
+        codes = {s: i for i, s in enumerate(dict.fromkeys(states))}
+        rules = [(codes[frm], _condition(cond, columns).tolist(), codes[to])
+                 for frm, cond, to in self.transitions]
+
+        out = np.empty(columns.length, dtype=np.int64)
+        if columns.length:
+            out[0] = current = codes[self.initial]
+            for i in range(1, columns.length):
+                for frm, mask, to in rules:
+                    if current == frm and mask[i]:
+                        current = to
+                        break
+                out[i] = current
+        columns[self.output] = np.array(list(codes), dtype=object)[out]
+
+
+class RunLength:
+    """같은 값이 연속된 일수 (당일 포함)."""
+    def __init__(self, output, source):
+        self.output = output
+        self.source = source
+
+    def run(self, columns):
+        values = np.asarray(columns[self.source], dtype=object)
+        idx = np.arange(columns.length)
+        same = np.zeros(columns.length, dtype=bool)
+        same[1:] = values[1:] == values[:-1]
+        run_start = np.maximum.accumulate(np.where(same, 0, idx)) if columns.length else idx
+        columns[self.output] = idx - run_start + 1
+
+
+class _Columns(dict):
+    """규칙 실행 중의 컬럼 저장소. 필요한 DataFrame 컬럼만 NumPy 배열로 꺼내옵니다."""
+    def __init__(self, df, extra):
+        super().__init__()
+        self.df = df
+        self.extra = extra
+        self.length = len(df)
+
+    def __missing__(self, name):
+        if name in self.extra:
+            values = np.asarray(self.extra[name])
+        else:
+            values = self.df[name].to_numpy()
+        self[name] = values
+        return values
+
+
+class RuleSet:
+    """규칙 단계 묶음. apply()는 각 단계의 출력 컬럼이 추가된 DataFrame 복사본을 반환합니다."""
+    def __init__(self, *steps):
+        self.steps = steps
+
+    def run(self, df, **extra):
+        columns = _Columns(df, extra)
+        outputs = []
+        for step in self.steps:
+            step.run(columns)
+            for output in getattr(step, "outputs", (getattr(step, "output", None),)):
+                if output not in outputs:
+                    outputs.append(output)
+        return {name: columns[name] for name in outputs}
+
+    def apply(self, df, **extra):
+        result = df.copy()
+        for name, values in self.run(df, **extra).items():
+            result[name] = values
+        return result
+
+# ==============================================================================
+# 레버리지(코스피) 전략 규칙
+# ==============================================================================
+# 전일-당일 포지션 조합에 따른 매수/매도 액션 매핑 테이블
+ACTION_MAP = {
+    ("현금보유", "레버리지"): ("레버리지", "없음"),
+    ("현금보유", "인버스"): ("인버스", "없음"),
+    ("레버리지", "현금보유"): ("없음", "레버리지"),
+    ("인버스", "현금보유"): ("없음", "인버스"),
+    ("레버리지", "인버스"): ("인버스", "레버리지"),
+    ("인버스", "레버리지"): ("레버리지", "인버스"),
+}
+
+def leverage_decision_rules(disparity_low=98, disparity_high=106, inverse_disparity=101, inverse_change=0.5):
+    disparity = col("Disparity")
+    # 조건1 (거래량 감소) 또는 조건2 (저가 상승)
+    volume_or_low = (col("Volume") < col("Volume_MA3")) | (col("Low") > col("Low").shift(1))
+    return [
+        Classify("판단", [
+            # 조건1,2 충족 & 이격도 기준 벗어남 -> 레버리지, 이외는 현금보유
+            (volume_or_low & ((disparity < disparity_low) | (disparity > disparity_high)), "레버리지"),
+            (volume_or_low, "현금보유"),
+            # 조건1,2 미충족 시 인버스 진입 조건: 이격도 < 101 & ABS(당일 이격도 - 전날 이격도) >= 0.5
+            ((disparity < inverse_disparity) & (abs(disparity - disparity.shift(1)) >= inverse_change), "인버스"),
+        ], default="현금보유"),
+    ]
+
+def overnight_rules(review_column=None):
+    """
+    '현금보유' 판단일 중 다음날 UR > max(LR_today, LR_yesterday)이면 '오버나잇'으로 변경.
+    review_column을 주면 해당 불리언 컬럼이 True인 행만 검토합니다.
+    """
+    next_open = col("Open").shift(-1)
+    ur = col("High").shift(-1) - next_open
+    lr_today = next_open - col("Low").shift(-1)
+    lr_yesterday = col("Open") - col("Low")
+    when = (col("판단") == "현금보유") & (ur > maximum(lr_today, lr_yesterday))
+    if review_column is not None:
+        when = col(review_column) & when
+    return [Override("판단", when, "오버나잇")]
+
+def leverage_action_rules(action_map=ACTION_MAP, disparity_high=106):
+    decision = col("판단")
+    buy, sell = col("매수액션"), col("매도액션")
+    # 매도가 "레버리지"일 때 전일 이격도에 따라 시가/종가 구분
+    prev_disparity_high = col("Disparity").shift(1) > disparity_high
+    # 예외: 전일 '레버리지'이고 당일 '오버나잇'일 경우 (포지션 유지 의미)
+    overnight_hold = (decision.shift(1) == "레버리지") & (decision == "오버나잇")
+    return [
+        # '오버나잇'을 '레버리지' 포지션으로 간주하여 액션 판단
+        Transition(("매수액션", "매도액션"), "판단", action_map, default=("없음", "없음"), aliases={"오버나잇": "레버리지"}),
+        Override("매수액션", (buy == "레버리지") & (decision == "오버나잇"), "레버리지 종가"),
+        Override("매수액션", buy == "레버리지", "레버리지 시가"),
+        Override("매도액션", (sell == "레버리지") & prev_disparity_high, "레버리지 종가"),
+        Override("매도액션", sell == "레버리지", "레버리지 시가"),
+        Override("매수액션", overnight_hold, "레버리지 종가"),
+        Override("매도액션", overnight_hold & prev_disparity_high, "레버리지 종가"),
+        Override("매도액션", overnight_hold & ~prev_disparity_high, "레버리지 시가"),
+    ]
+
+# ==============================================================================
+# 코스닥150 레버리지 전략 규칙
+# ==============================================================================
+def kosdaq_threshold_rules(buy_range=0.4, sell_range=0.3, max_close_open_days=10):
+    prev_range = col("High").shift(1) - col("Low").shift(1)
+    # 직전 10개 영업일의 max(close - open) (하락일은 0 처리)
+    max_close_open = rolling_max(maximum(col("Close") - col("Open"), 0), max_close_open_days).shift(1)
+    return [
+        Column("K_B", ceil(col("Open") + minimum(prev_range * buy_range, max_close_open))),
+        Column("K_S", floor(col("Open") - prev_range * sell_range)),
+    ]
+
+def kosdaq_position_rules(disparity_high=106):
+    return [
+        StateMachine("포지션", initial="현금", transitions=[
+            # 매수 조건: 전일 현금 & K(B)가 당일 고가~저가 범위 내
+            ("현금", between(col("K_B"), col("Low"), col("High")), "보유"),
+            # 매도 조건: 전일 보유 & K(S)가 당일 고가~저가 범위 내 & 양쪽 전일 이격도 106 이하
+            ("보유", between(col("K_S"), col("Low"), col("High"))
+                     & (col("Disparity").shift(1) <= disparity_high)
+                     & (col("Leverage_Disparity").shift(1) <= disparity_high), "현금"),
+        ]),
+    ]
+
+# 대시보드 기본 규칙 (오버나잇은 "오버나잇_검토" 컬럼이 True인 행만 검토)
+# 기본 판단과 K(B)/K(S)는 indicators 레지스트리에서 계산하고, 이후 단계만 *_SIGNAL_RULES로 실행합니다.
+LEVERAGE_SIGNAL_RULES = RuleSet(
+    *overnight_rules(review_column="오버나잇_검토"),
+    *leverage_action_rules(),
+    RunLength("신호지속일", "판단"),
+)
+LEVERAGE_RULES = RuleSet(*leverage_decision_rules(), *LEVERAGE_SIGNAL_RULES.steps)
+KOSDAQ_POSITION_RULES = RuleSet(*kosdaq_position_rules())
+KOSDAQ_RULES = RuleSet(*kosdaq_threshold_rules(), *KOSDAQ_POSITION_RULES.steps)
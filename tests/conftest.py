@@ -0,0 +1,16 @@
+import importlib.util
+import os
+
+import pytest
+
+
+@pytest.fixture(scope="session")
+def lv():
+    # 파일명에 공백이 있어 경로로 로드 (__name__이 "__main__"이 아니므로 UI는 실행되지 않음)
+    spec = importlib.util.spec_from_file_location(
+        "lv_strategy_kq",
+        os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "LV Strategy_KQ.py"),
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+import pandas.testing as tm
+
+from indicators import IndicatorFrame
+
+COLUMNS = ["Volume_MA3", "Close_MA20", "Disparity", "판단", "K_B", "K_S"]
+
+
+def _bars(n, seed=0):
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range("2026-06-01", periods=n)
+    close = 10000 + np.cumsum(rng.normal(0, 150, n))
+    open_ = close + rng.normal(0, 80, n)
+    return pd.DataFrame({
+        "Open": open_.round(),
+        "High": (np.maximum(open_, close) + rng.uniform(0, 150, n)).round(),
+        "Low": (np.minimum(open_, close) - rng.uniform(0, 150, n)).round(),
+        "Close": close.round(),
+        "Volume": rng.integers(100_000, 1_000_000, n).astype(float),
+    }, index=index)
+
+
+def _assert_same_as_fresh(frame, bars):
+    tm.assert_frame_equal(frame.columns(*COLUMNS), IndicatorFrame(bars).columns(*COLUMNS))
+
+
+def test_update_matches_fresh_frame():
+    bars = _bars(60)
+    frame = IndicatorFrame(bars.iloc[:55])
+    frame.columns(*COLUMNS)
+    frame.update(bars)
+    _assert_same_as_fresh(frame, bars)
+
+
+def test_update_with_nan_input_matches_fresh_frame():
+    bars = _bars(60)
+    frame = IndicatorFrame(bars.iloc[:58])
+    frame.columns(*COLUMNS)
+
+    # 마지막 봉의 거래량/종가가 결측으로 수정되고 새 봉이 추가됨 (이동평균은 이전 값으로 채워짐)
+    revised = bars.copy()
+    revised.iloc[57, revised.columns.get_loc("Volume")] = np.nan
+    revised.iloc[57, revised.columns.get_loc("Close")] = np.nan
+    frame.update(revised)
+    _assert_same_as_fresh(frame, revised)
+    assert not np.isnan(frame["Volume_MA3"].iloc[57])
+
+
+def test_set_params_matches_fresh_frame():
+    bars = _bars(60)
+    frame = IndicatorFrame(bars)
+    frame.columns(*COLUMNS)
+    frame.set_params("Close_MA20", window=10)
+    tm.assert_frame_equal(frame.columns(*COLUMNS),
+                          IndicatorFrame(bars, params={"Close_MA20": {"window": 10}}).columns(*COLUMNS))
@@ -0,0 +1,92 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+SESSIONS = 20
+
+
+class CountingCompute:
+    """호출 횟수를 세고, delay초 뒤 결과(또는 예외)를 돌려주는 가짜 계산."""
+    def __init__(self, result=None, error=None, delay=0.2):
+        self.calls = 0
+        self.result = result
+        self.error = error
+        self.delay = delay  # 동시에 시작한 세션들이 진행 중인 Future를 얻을 시간
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+def _concurrently(call, sessions=SESSIONS):
+    # 모든 세션이 동시에 call을 실행하고, 결과 또는 예외를 모읍니다
+    ready = threading.Barrier(sessions + 1)
+
+    def session():
+        ready.wait()
+        try:
+            return call()
+        except Exception as e:
+            return e
+
+    with ThreadPoolExecutor(max_workers=sessions) as pool:
+        futures = [pool.submit(session) for _ in range(sessions)]
+        ready.wait()
+        return [future.result() for future in futures]
+
+
+def test_concurrent_get_snapshot_computes_once(lv):
+    state = lv.SharedState(bucket_seconds=10**9)
+    state._build_snapshot = compute = CountingCompute(result={"version": lv.SNAPSHOT_VERSION})
+
+    results = _concurrently(state.get_snapshot)
+    assert compute.calls == 1
+    assert all(result is results[0] for result in results)
+    # 같은 버킷의 다음 요청은 완료된 결과를 재사용
+    assert state.get_snapshot() is results[0]
+    assert compute.calls == 1
+
+
+def test_failed_compute_reaches_every_waiter_and_is_retried(lv):
+    state = lv.SharedState(bucket_seconds=10**9)
+    state._build_snapshot = compute = CountingCompute(error=RuntimeError("fetch failed"))
+
+    results = _concurrently(state.get_snapshot)
+    assert compute.calls == 1
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+    # 실패한 결과는 보관하지 않으므로 다음 요청은 다시 계산
+    compute.error, compute.result, compute.delay = None, "snapshot", 0
+    assert state.get_snapshot() == "snapshot"
+    assert compute.calls == 2
+
+
+def test_new_bucket_evicts_old_one_while_its_leader_runs(lv):
+    state = lv.SharedState()
+    release = threading.Event()
+    entered = threading.Event()
+
+    def slow_compute():
+        entered.set()
+        release.wait(timeout=5)
+        return "old"
+
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        old = pool.submit(state.single_flight, ("snapshot", 1), slow_compute)
+        assert entered.wait(timeout=5)
+
+        assert state.single_flight(("snapshot", 2), lambda: "new") == "new"
+        assert list(state._futures) == [("snapshot", 2)]
+
+        release.set()
+        assert old.result(timeout=5) == "old"
+    # 이전 버킷의 리더가 끝나도 새 버킷 결과는 유지
+    assert list(state._futures) == [("snapshot", 2)]
+    assert state.single_flight(("snapshot", 2), pytest.fail) == "new"
@@ -0,0 +1,92 @@
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from signal_store import HEADER_STRATEGY, SignalStore, bar_window_hash, make_record, signal_records
+
+
+def _bars(n=30):
+    index = pd.bdate_range("2026-09-01", periods=n)
+    close = np.arange(n, dtype=float) + 100
+    return pd.DataFrame({"Open": close, "High": close + 1, "Low": close - 1, "Close": close,
+                         "Volume": np.full(n, 1000)}, index=index)
+
+
+def test_bar_window_hash_covers_earlier_bars():
+    bars = _bars()
+    revised = bars.copy()
+    revised.iloc[-5, revised.columns.get_loc("Close")] += 1
+    end = bars.index[-1]
+    assert bar_window_hash(bars, end, lookback=10) != bar_window_hash(revised, end, lookback=10)
+    assert bar_window_hash(bars, end, lookback=3) == bar_window_hash(revised, end, lookback=3)
+
+
+def test_record_skips_unchanged_latest_value(tmp_path):
+    store = SignalStore(str(tmp_path / "signals.sqlite"))
+    bars = _bars().assign(판단="레버리지")
+    at = datetime(2026, 10, 19, 1, 0, tzinfo=timezone.utc)
+    assert store.record(signal_records(bars.tail(1), "122630", "leverage", "판단", computed_at=at, lookback=20)) == 1
+    assert store.record(signal_records(bars.tail(1), "122630", "leverage", "판단",
+                                       computed_at=at + timedelta(hours=1), lookback=20)) == 0
+
+
+def test_signal_at_returns_header_shown_at_that_time(tmp_path):
+    store = SignalStore(str(tmp_path / "signals.sqlite"))
+    t0 = datetime(2026, 10, 19, 0, 0, tzinfo=timezone.utc)
+    # 전일이 오버나잇이면 헤더는 최신 봉보다 하루 앞선 날짜를 표시
+    store.record([make_record("122630", HEADER_STRATEGY, "2026-10-16", "오버나잇", "a", {"신호지속일": 1}, t0)])
+    store.record([make_record("122630", HEADER_STRATEGY, "2026-10-19", "레버리지", "b", {"신호지속일": 2},
+                              t0 + timedelta(hours=2))])
+    store.record([make_record("122630", HEADER_STRATEGY, "2026-10-16", "오버나잇", "a", {"신호지속일": 1},
+                              t0 + timedelta(hours=4))])
+
+    assert store.signal_at("122630", t0 + timedelta(hours=1))["signal"] == "오버나잇"
+    assert store.signal_at("122630", t0 + timedelta(hours=3))["bar_date"] == "2026-10-19"
+    shown = store.signal_at("122630", t0 + timedelta(hours=5))
+    assert (shown["bar_date"], shown["signal"], shown["details"]) == ("2026-10-16", "오버나잇", {"신호지속일": 1})
+
+
+def _fake_bars(seed, n=45):
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range("2026-08-24", periods=n)
+    close = 10000 + np.cumsum(rng.normal(0, 150, n))
+    open_ = close + rng.normal(0, 80, n)
+    return pd.DataFrame({
+        "Open": open_.round(),
+        "High": (np.maximum(open_, close) + rng.uniform(0, 150, n)).round(),
+        "Low": (np.minimum(open_, close) - rng.uniform(0, 150, n)).round(),
+        "Close": close.round(),
+        "Volume": rng.integers(100_000, 1_000_000, n),
+    }, index=index)
+
+
+@pytest.mark.parametrize("seed, signal_date, decision", [
+    (3, "2026-10-23", "레버리지"),  # 헤더는 최근일 판단
+    (6, "2026-10-22", "오버나잇"),  # 전일이 오버나잇이면 헤더는 전일 판단
+])
+def test_build_snapshot_records_header_under_its_decision_date(lv, tmp_path, seed, signal_date, decision):
+    bars = _fake_bars(seed)
+    store = SignalStore(str(tmp_path / "signals.sqlite"))
+    snapshot = lv.build_snapshot(lambda ticker, start, end: bars, store=store)
+
+    header = snapshot["header"]
+    assert (header["signal_date"], header["decision"]) == (signal_date, decision)
+    # 헤더 판단은 signal_date 봉 자신의 판단
+    recent = lv.calculate_leverage_strategy(lv.prepare_leverage_indicators(lv.IndicatorFrame(bars)))
+    assert recent.loc[signal_date, "판단"] == decision
+
+    shown = store.signal_at(lv.LEVERAGE_TICKER, datetime.now(timezone.utc))
+    assert shown["strategy"] == HEADER_STRATEGY
+    assert (shown["bar_date"], shown["signal"]) == (signal_date, decision)
+    assert shown["details"] == {"신호지속일": header["signal_streak"],
+                                "매수액션": header["매수액션"], "매도액션": header["매도액션"]}
+
+    # 레버리지/코스닥 신호는 마지막 봉만 기록하고, 같은 입력으로 다시 계산하면 추가 기록 없음
+    latest = bars.index[-1].strftime("%Y-%m-%d")
+    assert [row["bar_date"] for row in store.history(lv.LEVERAGE_TICKER, "leverage", "2026-01-01", "2026-12-31")] == [latest]
+    assert [row["bar_date"] for row in store.history(lv.KOSDAQ_LEVERAGE_TICKER, "kosdaq", "2026-01-01", "2026-12-31")] == [latest]
+    lv.build_snapshot(lambda ticker, start, end: bars, store=store)
+    assert store.conn.execute("SELECT COUNT(*) FROM signals").fetchone()[0] == 3
+    store.close()
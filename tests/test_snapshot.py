@@ -0,0 +1,89 @@
+import json
+import os
+import stat
+
+import numpy as np
+import pandas as pd
+
+from signal_store import SignalStore
+
+
+def _snapshot(lv):
+    return {
+        "version": lv.SNAPSHOT_VERSION,
+        "generated_at": "2026-10-19T08:30:00+09:00",
+        "header": {"date": "2026-10-20", "signal_date": "2026-10-19", "decision": "레버리지",
+                   "signal_streak": 2, "매수액션": "없음", "매도액션": "없음"},
+        "strategy_rows": [{"date": "10/19", "판단": "레버리지", "is_latest": True}],
+        "overnight_calculator": None,
+        "kosdaq": None,
+    }
+
+
+def test_write_then_load_round_trip(lv, tmp_path):
+    path = str(tmp_path / "snapshot.json")
+    lv.write_snapshot(_snapshot(lv), path)
+    assert lv.load_snapshot(path) == _snapshot(lv)
+    # 임시 파일이 남지 않음
+    assert os.listdir(tmp_path) == ["snapshot.json"]
+
+
+def test_written_snapshot_is_world_readable(lv, tmp_path):
+    path = str(tmp_path / "snapshot.json")
+    lv.write_snapshot(_snapshot(lv), path)
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o644
+
+
+def test_load_snapshot_rejects_missing_corrupt_and_old_version(lv, tmp_path):
+    assert lv.load_snapshot(str(tmp_path / "missing.json")) is None
+
+    corrupt = tmp_path / "corrupt.json"
+    corrupt.write_text('{"version": 1, "header":', encoding="utf-8")
+    assert lv.load_snapshot(str(corrupt)) is None
+
+    old = tmp_path / "old.json"
+    old.write_text(json.dumps(dict(_snapshot(lv), version=lv.SNAPSHOT_VERSION - 1)), encoding="utf-8")
+    assert lv.load_snapshot(str(old)) is None
+
+
+def _bars(n, seed=0):
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range("2026-08-24", periods=n)
+    close = 10000 + np.cumsum(rng.normal(0, 150, n))
+    open_ = close + rng.normal(0, 80, n)
+    return pd.DataFrame({
+        "Open": open_.round(),
+        "High": (np.maximum(open_, close) + rng.uniform(0, 150, n)).round(),
+        "Low": (np.minimum(open_, close) - rng.uniform(0, 150, n)).round(),
+        "Close": close.round(),
+        "Volume": rng.integers(100_000, 1_000_000, n),
+    }, index=index)
+
+
+def _without_time(snapshot):
+    return {key: value for key, value in snapshot.items() if key != "generated_at"}
+
+
+def test_refresh_snapshot_reuses_frames_across_refreshes(lv, tmp_path):
+    path = str(tmp_path / "snapshot.json")
+    store = SignalStore(str(tmp_path / "signals.sqlite"))
+    bars = _bars(46)
+    frames = {}
+
+    assert lv.refresh_snapshot(store, frames, lambda ticker, start, end: bars.iloc[:45], path)
+    leverage_frame = frames[lv.LEVERAGE_TICKER]
+
+    # 다음 갱신: 새 봉이 추가되어도 같은 IndicatorFrame을 갱신하고, 결과는 새로 계산한 것과 같음
+    assert lv.refresh_snapshot(store, frames, lambda ticker, start, end: bars, path)
+    assert frames[lv.LEVERAGE_TICKER] is leverage_frame
+    fresh = lv.build_snapshot(lambda ticker, start, end: bars)
+    assert _without_time(lv.load_snapshot(path)) == _without_time(fresh)
+    store.close()
+
+
+def test_refresh_snapshot_keeps_file_when_data_is_short(lv, tmp_path):
+    path = str(tmp_path / "snapshot.json")
+    store = SignalStore(str(tmp_path / "signals.sqlite"))
+    assert not lv.refresh_snapshot(store, {}, lambda ticker, start, end: _bars(10), path)
+    assert not os.path.exists(path)
+    store.close()
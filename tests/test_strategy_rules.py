@@ -0,0 +1,187 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from strategy_rules import (
+    ACTION_MAP,
+    KOSDAQ_POSITION_RULES,
+    LEVERAGE_SIGNAL_RULES,
+    Classify,
+    Override,
+    RuleSet,
+    StateMachine,
+    col,
+    kosdaq_threshold_rules,
+    leverage_action_rules,
+    overnight_rules,
+)
+
+
+def _frame():
+    return pd.DataFrame({"x": [5.0, 1.0, 5.0, 5.0, 1.0], "y": [1.0, 1.0, 1.0, 0.0, 1.0]})
+
+
+def test_shifted_condition_combines_with_and_and_invert():
+    rules = RuleSet(
+        Classify("and", [((col("x") > 3).shift(1) & (col("y") > 0), "yes")], "no"),
+        Classify("not", [(~(col("x") > 3).shift(1), "yes")], "no"),
+    )
+    result = rules.run(_frame())
+    # 첫 행은 전일 값이 없으므로 None, 이후는 전일 x > 3 기준
+    assert list(result["and"]) == [None, "yes", "no", "no", "yes"]
+    assert list(result["not"]) == [None, "no", "yes", "no", "no"]
+
+
+def test_shifted_condition_does_not_fire_without_data():
+    # x > 3은 모든 행에서 충족이므로 ~(...)는 시프트로 값이 없는 첫/마지막 행에서만 잘못 충족될 수 있음
+    df = pd.DataFrame({"x": [5.0, 5.0, 5.0], "state": ["a", "a", "a"]})
+    rules = RuleSet(
+        Override("state", ~(col("x") > 3).shift(1), "b"),
+        StateMachine("machine", "off", [("off", ~(col("x") > 3).shift(-1), "on")]),
+    )
+    result = rules.run(df)
+    assert list(result["state"]) == ["a", "a", "a"]
+    assert list(result["machine"]) == ["off", "off", "off"]
+
+
+def test_nan_condition_is_not_met():
+    df = pd.DataFrame({"x": [np.nan, 0.0, 2.0], "flag": [False, False, False]})
+    result = RuleSet(Override("flag", col("x"), True)).run(df)
+    assert list(result["flag"]) == [False, False, True]
+
+
+# ==============================================================================
+# 대시보드 규칙 (이전 구현과 같은 결과를 내도록 고정)
+# ==============================================================================
+def _actions(prev_decision, decision, prev_disparity=100.0):
+    df = pd.DataFrame({"판단": [prev_decision, decision], "Disparity": [prev_disparity, 100.0]})
+    result = RuleSet(*leverage_action_rules()).run(df)
+    assert (result["매수액션"][0], result["매도액션"][0]) == ("없음", "없음")
+    return result["매수액션"][1], result["매도액션"][1]
+
+
+ACTION_CASES = [
+    ("현금보유", "레버리지", ("레버리지 시가", "없음")),
+    ("현금보유", "인버스", ("인버스", "없음")),
+    ("레버리지", "현금보유", ("없음", "레버리지 시가")),
+    ("인버스", "현금보유", ("없음", "인버스")),
+    ("레버리지", "인버스", ("인버스", "레버리지 시가")),
+    ("인버스", "레버리지", ("레버리지 시가", "인버스")),
+    ("레버리지", "레버리지", ("없음", "없음")),
+    ("현금보유", "현금보유", ("없음", "없음")),
+]
+
+
+@pytest.mark.parametrize("prev_decision, decision, expected", ACTION_CASES)
+def test_action_map_pairs(prev_decision, decision, expected):
+    assert _actions(prev_decision, decision) == expected
+
+
+def test_action_map_pairs_are_all_covered():
+    assert set(ACTION_MAP) <= {(prev, today) for prev, today, _ in ACTION_CASES}
+
+
+def test_leverage_sell_at_close_when_previous_disparity_is_high():
+    assert _actions("레버리지", "현금보유", prev_disparity=107.0) == ("없음", "레버리지 종가")
+    assert _actions("레버리지", "인버스", prev_disparity=106.0) == ("인버스", "레버리지 시가")
+
+
+@pytest.mark.parametrize("prev_decision, decision, prev_disparity, expected", [
+    # 오버나잇은 레버리지 포지션으로 간주하고, 오버나잇 진입 매수는 종가
+    ("현금보유", "오버나잇", 100.0, ("레버리지 종가", "없음")),
+    ("오버나잇", "현금보유", 100.0, ("없음", "레버리지 시가")),
+    ("오버나잇", "인버스", 107.0, ("인버스", "레버리지 종가")),
+    ("오버나잇", "레버리지", 100.0, ("없음", "없음")),
+    ("인버스", "오버나잇", 100.0, ("레버리지 종가", "인버스")),
+    # 예외: 전일 레버리지 -> 당일 오버나잇은 종가 매수, 매도는 전일 이격도에 따라 시가/종가
+    ("레버리지", "오버나잇", 100.0, ("레버리지 종가", "레버리지 시가")),
+    ("레버리지", "오버나잇", 107.0, ("레버리지 종가", "레버리지 종가")),
+])
+def test_overnight_is_aliased_to_leverage(prev_decision, decision, prev_disparity, expected):
+    assert _actions(prev_decision, decision, prev_disparity) == expected
+
+
+def _overnight_frame():
+    # 0행: 다음날 UR 20 > max(LR 5, 전일 LR 10) -> 오버나잇 대상
+    # 1행: 다음날 UR 30 > max(LR 1, 전일 LR 5) -> 오버나잇 대상
+    # 2행: 레버리지라 대상 아님, 3행: 다음날 봉이 없어 대상 아님
+    return pd.DataFrame({
+        "판단": ["현금보유", "현금보유", "레버리지", "현금보유"],
+        "Open": [100.0, 100.0, 100.0, 100.0],
+        "High": [110.0, 120.0, 130.0, 140.0],
+        "Low": [90.0, 95.0, 99.0, 90.0],
+        "Disparity": [100.0, 100.0, 107.0, 100.0],
+    })
+
+
+def test_overnight_override_respects_review_mask():
+    df = _overnight_frame()
+    assert list(RuleSet(*overnight_rules()).run(df)["판단"]) == ["오버나잇", "오버나잇", "레버리지", "현금보유"]
+
+    review = np.array([True, False, True, True])
+    result = RuleSet(*overnight_rules(review_column="검토")).run(df, 검토=review)
+    assert list(result["판단"]) == ["오버나잇", "현금보유", "레버리지", "현금보유"]
+
+
+def test_overnight_needs_ur_strictly_above_lr():
+    df = _overnight_frame()
+    df.loc[1, "High"] = 110.0  # 0행의 다음날 UR 10 == 전일 LR 10
+    assert RuleSet(*overnight_rules()).run(df)["판단"][0] == "현금보유"
+
+
+def test_leverage_signal_rules():
+    review = np.array([True, False, True, True])
+    result = LEVERAGE_SIGNAL_RULES.apply(_overnight_frame(), 오버나잇_검토=review)
+    assert list(result["판단"]) == ["오버나잇", "현금보유", "레버리지", "현금보유"]
+    assert list(result["매수액션"]) == ["없음", "없음", "레버리지 시가", "없음"]
+    assert list(result["매도액션"]) == ["없음", "레버리지 시가", "없음", "레버리지 종가"]
+    assert list(result["신호지속일"]) == [1, 1, 1, 1]
+
+
+def _kosdaq_bars():
+    return pd.DataFrame({
+        "Open": [100.0, 106.0, 103.0, 116.0],
+        "High": [110.0, 112.0, 120.0, 118.0],
+        "Low": [95.0, 100.0, 101.0, 110.0],
+        "Close": [105.0, 104.0, 115.0, 111.0],
+    })
+
+
+def test_kosdaq_thresholds():
+    result = RuleSet(*kosdaq_threshold_rules()).run(_kosdaq_bars())
+    # K(B) = ceil(시가 + min(전일 범위 x 0.4, 전일까지 max(종가 - 시가, 0)))
+    #   1행: 106 + min(15 x 0.4, 5) = 111, 2행: 103 + min(4.8, 5) = 107.8, 3행: 116 + min(7.6, 12) = 123.6
+    # K(S) = floor(시가 - 전일 범위 x 0.3)
+    #   1행: 106 - 4.5 = 101.5, 2행: 103 - 3.6 = 99.4, 3행: 116 - 5.7 = 110.3
+    np.testing.assert_array_equal(result["K_B"], [np.nan, 111, 108, 124])
+    np.testing.assert_array_equal(result["K_S"], [np.nan, 101, 99, 110])
+
+
+def test_kosdaq_buy_threshold_window_excludes_today():
+    # 직전 1일만 보면 2행은 전일(1행) 하락일이라 max(종가 - 시가) = 0 -> K(B) = 시가
+    result = RuleSet(*kosdaq_threshold_rules(max_close_open_days=1)).run(_kosdaq_bars())
+    np.testing.assert_array_equal(result["K_B"], [np.nan, 111, 103, 124])
+
+
+def _position_frame(leverage_disparity=100.0):
+    return pd.DataFrame({
+        "High": [105.0] * 6,
+        "Low": [95.0] * 6,
+        "K_B": [100.0, 100.0, 100.0, 100.0, 100.0, 200.0],
+        "K_S": [100.0, 100.0, 90.0, 100.0, 100.0, 100.0],
+        "Disparity": [100.0, 100.0, 107.0, 100.0, 100.0, 100.0],
+        "Leverage_Disparity": leverage_disparity,
+    })
+
+
+def test_kosdaq_position_buy_hold_sell():
+    # 0행: 첫 행은 현금, 1행: K(B) 범위 내 매수, 2행: K(S) 범위 밖 보유,
+    # 3행: K(S) 범위 내지만 전일 이격도 107 > 106 보유, 4행: 매도, 5행: K(B) 범위 밖 현금 유지
+    result = KOSDAQ_POSITION_RULES.run(_position_frame())
+    assert list(result["포지션"]) == ["현금", "보유", "보유", "보유", "현금", "현금"]
+
+
+def test_kosdaq_position_holds_without_leverage_disparity():
+    # 레버리지 이격도가 없으면(999) 매도 조건을 충족하지 않음
+    result = KOSDAQ_POSITION_RULES.run(_position_frame(leverage_disparity=999.0))
+    assert list(result["포지션"]) == ["현금", "보유", "보유", "보유", "보유", "보유"]